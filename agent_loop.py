@@ -0,0 +1,182 @@
+"""Shared agentic loop — chat → tool_use → tool_result until the model is done.
+
+jarvis.py, briefing.py and briefing_pi.py all drive this one engine and only
+differ in the hooks they plug in (how text and tool calls are printed, which
+tools are dispatched, what counts as over budget).
+"""
+
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from config import ModelConfig
+from context import ContextManager
+from models import ChatResult, StreamEvent, chat, chat_stream
+from tools import MAX_PARALLEL, cacheable, execute_tool, parallel_safe, timed_call
+from usage import UsageTracker
+
+
+@dataclass
+class IterationStats:
+    index: int
+    chat_seconds: float
+    tool_seconds: float
+    tool_calls: int
+
+
+def print_text(text: str) -> None:
+    print(f"Agent: {text}")
+
+
+def print_text_start() -> None:
+    print("Agent: ", end="", flush=True)
+
+
+def print_text_delta(delta: str) -> None:
+    print(delta, end="", flush=True)
+
+
+def print_tool_call(block) -> None:
+    print(f"  -> tool: {block.name}({json.dumps(block.input, indent=2)})")
+
+
+def print_tool_result(block, result: str, elapsed: float) -> None:
+    print(f"  <- {block.name} ({elapsed:.2f}s) {result[:200]}{'...' if len(result) > 200 else ''}\n")
+
+
+@dataclass
+class AgentLoop:
+    model: ModelConfig
+    system: str
+    tools: list
+    tracker: UsageTracker
+    max_parallel: int = MAX_PARALLEL
+    context: ContextManager | None = None  # compacts history before each run
+
+    # Hooks — swap these to change how the loop talks to the outside world
+    chat_fn: Callable[..., ChatResult] = chat
+    stream_fn: Callable[..., Iterator[StreamEvent]] = chat_stream
+    dispatch: Callable[[str, dict], str] = execute_tool
+    is_parallel_safe: Callable[[str], bool] = parallel_safe
+    # Tools started while the response is still streaming, before the budget
+    # check — only cached read-only lookups, whose result is harmless to discard
+    starts_early: Callable[[str], bool] = cacheable
+    on_text: Callable[[str], None] = print_text
+    on_text_start: Callable[[], None] = print_text_start
+    on_text_delta: Callable[[str], None] = print_text_delta
+    on_tool_call: Callable[[object], None] = print_tool_call
+    on_tool_result: Callable[[object, str, float], None] = print_tool_result
+    on_iteration: Callable[[IterationStats], None] | None = None
+    budget_check: Callable[[], bool] | None = None
+
+    iterations: list[IterationStats] = field(default_factory=list, repr=False)
+
+    def over_budget(self) -> bool:
+        if self.budget_check is not None:
+            return self.budget_check()
+        return self.tracker.over_budget
+
+    def run(self, messages: list) -> list[str]:
+        """Run the loop on `messages` (mutated in place) until end_turn or budget.
+
+        Returns every text block the model produced along the way.
+        """
+        texts: list[str] = []
+        if self.context is not None:
+            self.context.compact(messages)
+
+        # One pool per run — its size is the per-turn cap on concurrent tool calls
+        with ThreadPoolExecutor(max_workers=max(1, self.max_parallel)) as pool:
+            while True:
+                start = time.perf_counter()
+                if self.model.stream:
+                    result, pending = self._stream_chat(messages, pool)
+                else:
+                    result = self.chat_fn(self.model, system=self.system, messages=messages, tools=self.tools)
+                    pending = {}
+                chat_seconds = time.perf_counter() - start
+                self.tracker.record(result, model_name=self.model.name)
+
+                for block in result.content:
+                    if block.type == "text":
+                        if not self.model.stream:
+                            self.on_text(block.text)
+                        texts.append(block.text)
+
+                if result.stop_reason == "end_turn" or self.over_budget():
+                    self._finish_iteration(chat_seconds, 0.0, 0)
+                    break
+
+                calls = [block for block in result.content if block.type == "tool_use"]
+                for block in calls:
+                    if block.id not in pending and self.is_parallel_safe(block.name):
+                        self.on_tool_call(block)
+                        pending[block.id] = pool.submit(timed_call, self.dispatch, block)
+
+                start = time.perf_counter()
+                outcomes: dict[str, tuple[str, float]] = {}
+                for block in calls:
+                    if block.id in pending:
+                        outcomes[block.id] = pending[block.id].result()
+                        self.on_tool_result(block, *outcomes[block.id])
+                # Side-effecting tools run one at a time, in order, after the parallel batch
+                for block in calls:
+                    if block.id not in outcomes:
+                        self.on_tool_call(block)
+                        outcomes[block.id] = timed_call(self.dispatch, block)
+                        self.on_tool_result(block, *outcomes[block.id])
+                tool_seconds = time.perf_counter() - start
+
+                tool_results = [
+                    {"type": "tool_result", "tool_use_id": block.id, "content": outcomes[block.id][0]}
+                    for block in calls
+                ]
+
+                messages.append({"role": "assistant", "content": result.content})
+                messages.append({"role": "user", "content": tool_results})
+                self._finish_iteration(chat_seconds, tool_seconds, len(calls))
+
+        return texts
+
+    def _stream_chat(self, messages: list, pool: ThreadPoolExecutor) -> tuple[ChatResult, dict[str, Future]]:
+        """Stream one response, starting each early-start tool as soon as its input is complete.
+
+        Every other tool waits for run() to dispatch it after the budget check.
+        """
+        pending: dict[str, Future] = {}
+        text_open = False
+        result = None
+
+        for event in self.stream_fn(self.model, system=self.system, messages=messages, tools=self.tools):
+            if event.type in ("text_start", "tool_use", "done") and text_open:
+                self.on_text_delta("\n")
+                text_open = False
+
+            if event.type == "text_start":
+                self.on_text_start()
+                text_open = True
+            elif event.type == "text":
+                self.on_text_delta(event.text)
+            elif event.type == "tool_use":
+                name = event.block.name
+                if not (self.is_parallel_safe(name) and self.starts_early(name)):
+                    continue
+                self.on_tool_call(event.block)
+                pending[event.block.id] = pool.submit(timed_call, self.dispatch, event.block)
+            elif event.type == "done":
+                result = event.result
+
+        return result, pending
+
+    def _finish_iteration(self, chat_seconds: float, tool_seconds: float, tool_calls: int) -> None:
+        stats = IterationStats(
+            index=len(self.iterations),
+            chat_seconds=chat_seconds,
+            tool_seconds=tool_seconds,
+            tool_calls=tool_calls,
+        )
+        self.iterations.append(stats)
+        if self.on_iteration is not None:
+            self.on_iteration(stats)
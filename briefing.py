@@ -1,10 +1,11 @@
-import json
+from functools import partial
 from pathlib import Path
 
 from dotenv import load_dotenv
-from tools import read_email, read_imessage, search_web, send_imessage, polymarket_search, polymarket_movers, polymarket_recommend, trends_search, trends_related, get_weather, check_tennis
+from tools import read_email, read_imessage, search_web, send_imessage, polymarket_search, polymarket_movers, polymarket_recommend, trends_search, trends_related, get_weather, check_tennis, cache_summary, configure_cache, execute_tool, http_summary, registry_for
+from tools._cli import warm as warm_cli
+from agent_loop import AgentLoop
 from config import load_config
-from models import chat
 from usage import UsageTracker
 
 import os
@@ -12,20 +13,14 @@ import os
 load_dotenv()
 
 cfg = load_config()
+configure_cache(cfg.cache)
 tracker = UsageTracker(budget=cfg.budget)
 SYSTEM_PROMPT_PATH = Path(__file__).parent / "JARVIS.md"
 OPERATOR_PHONE = os.environ.get("OPERATOR_PHONE", "")
 
 _modules = [read_email, read_imessage, search_web, send_imessage, polymarket_search, polymarket_movers, polymarket_recommend, trends_search, trends_related, get_weather, check_tennis]
 TOOLS = [m.schema for m in _modules]
-_registry = {m.schema["name"]: m.execute for m in _modules}
-
-
-def execute_tool(name: str, input: dict) -> str:
-    func = _registry.get(name)
-    if func is None:
-        return f"Unknown tool: {name}"
-    return func(**input)
+_registry = registry_for(_modules)
 
 
 def load_system_prompt() -> str:
@@ -34,39 +29,33 @@ def load_system_prompt() -> str:
     return "You are JARVIS, a sharp and concise personal AI agent."
 
 
+def _print_tool_call(block) -> None:
+    print(f"  -> {block.name}")
+
+
 def run():
+    # Import the polymarket/trends CLIs while the model works on its first turn
+    warm_cli("polymarket", "trends")
     messages = [{"role": "user", "content": "morning briefing"}]
     system = load_system_prompt()
     if OPERATOR_PHONE:
         system += f"\n\nOperator phone number: {OPERATOR_PHONE}"
 
-    while True:
-        result = chat(cfg.briefing, system=system, messages=messages, tools=TOOLS)
-        tracker.record(result, model_name=cfg.briefing.name)
-
-        for block in result.content:
-            if block.type == "text":
-                print(block.text)
-
-        if result.stop_reason == "end_turn" or tracker.over_budget:
-            break
-
-        tool_results = []
-        for block in result.content:
-            if block.type == "tool_use":
-                print(f"  -> {block.name}")
-                res = execute_tool(block.name, block.input)
-                print(f"  <- {res[:200]}{'...' if len(res) > 200 else ''}\n")
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": block.id,
-                    "content": res,
-                })
-
-        messages.append({"role": "assistant", "content": result.content})
-        messages.append({"role": "user", "content": tool_results})
+    loop = AgentLoop(
+        model=cfg.briefing,
+        system=system,
+        tools=TOOLS,
+        tracker=tracker,
+        max_parallel=cfg.tools.max_parallel,
+        dispatch=partial(execute_tool, registry=_registry),
+        on_text=print,
+        on_tool_call=_print_tool_call,
+    )
+    loop.run(messages)
 
     print(f"\n{tracker.summary(cfg.briefing.name)}")
+    print(cache_summary())
+    print(http_summary())
 
 
 if __name__ == "__main__":
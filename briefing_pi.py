@@ -1,3 +1,4 @@
+from functools import partial
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -10,8 +11,10 @@ import tools.trends_related as trends_related
 import tools.check_tennis as check_tennis
 import tools.get_weather as get_weather
 import tools.send_email as _send_email
+from tools._cli import warm as warm_cli
+from tools import cache_summary, configure_cache, execute_tool, http_summary, registry_for
+from agent_loop import AgentLoop
 from config import load_config
-from models import chat
 from usage import UsageTracker
 
 import os
@@ -19,20 +22,14 @@ import os
 load_dotenv()
 
 cfg = load_config()
+configure_cache(cfg.cache)
 tracker = UsageTracker(budget=cfg.budget)
 SYSTEM_PROMPT_PATH = Path(__file__).parent / "JARVIS_PI.md"
 OPERATOR_EMAIL = os.environ.get("OPERATOR_EMAIL", "t_wenrick@apple.com")
 
 _modules = [search_web, polymarket_search, polymarket_movers, polymarket_recommend, trends_search, trends_related, get_weather, check_tennis]
 TOOLS = [m.schema for m in _modules]
-_registry = {m.schema["name"]: m.execute for m in _modules}
-
-
-def execute_tool(name: str, input: dict) -> str:
-    func = _registry.get(name)
-    if func is None:
-        return f"Unknown tool: {name}"
-    return func(**input)
+_registry = registry_for(_modules)
 
 
 def load_system_prompt() -> str:
@@ -49,46 +46,41 @@ def deliver_briefing(text: str):
         subject=f"Morning Briefing — {date_str}",
         body=text,
         skip_confirm=True,
+        spool_on_failure=True,
     )
     print(f"Delivery: {result}")
 
 
+def _print_tool_call(block) -> None:
+    print(f"  -> {block.name}")
+
+
 def run():
+    # Import the polymarket/trends CLIs while the model works on its first turn
+    warm_cli("polymarket", "trends")
+    # Deliver anything a previous run couldn't send before starting a new one
+    for result in _send_email.flush_outbox():
+        print(f"Outbox: {result}")
+
     messages = [{"role": "user", "content": "morning briefing"}]
-    system = load_system_prompt()
-    briefing_text = []
-
-    while True:
-        result = chat(cfg.briefing, system=system, messages=messages, tools=TOOLS)
-        tracker.record(result, model_name=cfg.briefing.name)
-
-        for block in result.content:
-            if block.type == "text":
-                print(block.text)
-                briefing_text.append(block.text)
-
-        if result.stop_reason == "end_turn" or tracker.over_budget:
-            break
-
-        tool_results = []
-        for block in result.content:
-            if block.type == "tool_use":
-                print(f"  -> {block.name}")
-                res = execute_tool(block.name, block.input)
-                print(f"  <- {res[:200]}{'...' if len(res) > 200 else ''}\n")
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": block.id,
-                    "content": res,
-                })
-
-        messages.append({"role": "assistant", "content": result.content})
-        messages.append({"role": "user", "content": tool_results})
+    loop = AgentLoop(
+        model=cfg.briefing,
+        system=load_system_prompt(),
+        tools=TOOLS,
+        tracker=tracker,
+        max_parallel=cfg.tools.max_parallel,
+        dispatch=partial(execute_tool, registry=_registry),
+        on_text=print,
+        on_tool_call=_print_tool_call,
+    )
+    briefing_text = loop.run(messages)
 
     if briefing_text:
         deliver_briefing("\n\n".join(briefing_text))
 
     print(f"\n{tracker.summary(cfg.briefing.name)}")
+    print(cache_summary())
+    print(http_summary())
 
 
 if __name__ == "__main__":
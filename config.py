@@ -12,17 +12,45 @@ DEFAULTS = {
         "name": "claude-opus-4-6",
         "max_tokens": 4096,
         "temperature": 1.0,
+        "stream": False,
+        "prompt_cache": True,
     },
     "briefing": {
         "provider": "anthropic",
         "name": "claude-opus-4-6",
         "max_tokens": 4096,
         "temperature": 1.0,
+        "stream": False,
+        "prompt_cache": True,
     },
     "budget": {
         "max_tokens_per_session": 500_000,
         "warn_at_percent": 80,
     },
+    "tools": {
+        "max_parallel": 8,
+    },
+    "cache": {
+        "enabled": True,
+        "max_entries": 256,
+        "path": "~/.cache/jarvis/tools.db",
+    },
+    "weather": {
+        "locations": {
+            "home": {
+                "name": "San Francisco",
+                "latitude": 37.7749,
+                "longitude": -122.4194,
+                "timezone": "America/Los_Angeles",
+            },
+        },
+    },
+    "context": {
+        "max_tokens": 60_000,
+        "keep_recent_turns": 4,
+        "tool_result_max_chars": 2_000,
+        "summarize": True,
+    },
 }
 
 
@@ -32,6 +60,8 @@ class ModelConfig:
     name: str
     max_tokens: int
     temperature: float
+    stream: bool  # render text as it arrives and dispatch tools early
+    prompt_cache: bool  # Anthropic cache breakpoints on system, tools and history
 
 
 @dataclass
@@ -40,11 +70,49 @@ class BudgetConfig:
     warn_at_percent: int
 
 
+@dataclass
+class ToolsConfig:
+    max_parallel: int  # cap on concurrent tool calls within a single turn
+
+
+@dataclass
+class CacheConfig:
+    enabled: bool
+    max_entries: int  # in-memory LRU size
+    path: str  # SQLite backing store shared across runs ("" = memory only)
+
+
+@dataclass
+class ContextConfig:
+    max_tokens: int  # compact the history once its estimated size exceeds this
+    keep_recent_turns: int  # user turns always kept verbatim
+    tool_result_max_chars: int  # older tool results are elided past this length
+    summarize: bool  # summarise old turns (False = sliding window only)
+
+
+@dataclass
+class LocationConfig:
+    name: str
+    latitude: float
+    longitude: float
+    timezone: str
+    alerts: list[str]  # forecast rules evaluated for this location, e.g. ["snow"]
+
+
+@dataclass
+class WeatherConfig:
+    locations: dict[str, LocationConfig]  # keyed by the name the tool accepts
+
+
 @dataclass
 class Config:
     model: ModelConfig
     briefing: ModelConfig
     budget: BudgetConfig
+    tools: ToolsConfig
+    cache: CacheConfig
+    context: ContextConfig
+    weather: WeatherConfig
 
 
 def load_config(path: Path = CONFIG_PATH) -> Config:
@@ -63,6 +131,8 @@ def load_config(path: Path = CONFIG_PATH) -> Config:
         name=m.get("name", DEFAULTS["model"]["name"]),
         max_tokens=m.get("max_tokens", DEFAULTS["model"]["max_tokens"]),
         temperature=m.get("temperature", DEFAULTS["model"]["temperature"]),
+        stream=m.get("stream", DEFAULTS["model"]["stream"]),
+        prompt_cache=m.get("prompt_cache", DEFAULTS["model"]["prompt_cache"]),
     )
 
     briefing = ModelConfig(
@@ -70,6 +140,8 @@ def load_config(path: Path = CONFIG_PATH) -> Config:
         name=briefing_raw.get("name", DEFAULTS["briefing"]["name"]),
         max_tokens=briefing_raw.get("max_tokens", DEFAULTS["briefing"]["max_tokens"]),
         temperature=briefing_raw.get("temperature", DEFAULTS["briefing"]["temperature"]),
+        stream=briefing_raw.get("stream", DEFAULTS["briefing"]["stream"]),
+        prompt_cache=briefing_raw.get("prompt_cache", DEFAULTS["briefing"]["prompt_cache"]),
     )
 
     # Budget section
@@ -79,4 +151,43 @@ def load_config(path: Path = CONFIG_PATH) -> Config:
         warn_at_percent=b.get("warn_at_percent", DEFAULTS["budget"]["warn_at_percent"]),
     )
 
-    return Config(model=model, briefing=briefing, budget=budget)
+    # Tools section
+    t = raw.get("tools", {})
+    tools = ToolsConfig(
+        max_parallel=t.get("max_parallel", DEFAULTS["tools"]["max_parallel"]),
+    )
+
+    # Cache section
+    ca = raw.get("cache", {})
+    cache = CacheConfig(
+        enabled=ca.get("enabled", DEFAULTS["cache"]["enabled"]),
+        max_entries=ca.get("max_entries", DEFAULTS["cache"]["max_entries"]),
+        path=ca.get("path", DEFAULTS["cache"]["path"]),
+    )
+
+    # Context section
+    c = raw.get("context", {})
+    context = ContextConfig(
+        max_tokens=c.get("max_tokens", DEFAULTS["context"]["max_tokens"]),
+        keep_recent_turns=c.get("keep_recent_turns", DEFAULTS["context"]["keep_recent_turns"]),
+        tool_result_max_chars=c.get("tool_result_max_chars", DEFAULTS["context"]["tool_result_max_chars"]),
+        summarize=c.get("summarize", DEFAULTS["context"]["summarize"]),
+    )
+
+    # Weather section — [weather.locations.<key>] tables, kept in file order
+    w = raw.get("weather", {})
+    weather = WeatherConfig(locations={
+        key: LocationConfig(
+            name=loc.get("name", key),
+            latitude=loc["latitude"],
+            longitude=loc["longitude"],
+            timezone=loc.get("timezone", "auto"),
+            alerts=list(loc.get("alerts", [])),
+        )
+        for key, loc in (w.get("locations") or DEFAULTS["weather"]["locations"]).items()
+    })
+
+    return Config(
+        model=model, briefing=briefing, budget=budget, tools=tools,
+        cache=cache, context=context, weather=weather,
+    )
@@ -0,0 +1,166 @@
+"""Context window management — keep the resent conversation history bounded.
+
+Between user turns, once the history outgrows its budget, it is compacted in
+three steps, cheapest first: large tool_result payloads from older turns are
+elided, then (if still over budget) older turns are summarised into a compact
+block, and as a last resort the oldest turns are dropped. Cuts only ever happen
+at user-text boundaries, so every tool_use keeps its matching tool_result for
+both providers.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Callable
+
+from config import ContextConfig, ModelConfig
+from models import ChatResult, chat
+from usage import UsageTracker
+
+# Rough chars-per-token ratio for English text and JSON — close enough for thresholds
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PREFIX = "[Summary of earlier conversation]"
+
+SUMMARY_PROMPT = (
+    "You compress conversation transcripts for an AI agent's memory. Summarise the "
+    "transcript below into a compact brief: the operator's requests, decisions made, "
+    "facts and figures learned from tools, and anything left open. Keep names, numbers, "
+    "dates, file paths and URLs exactly. No preamble, no commentary — bullet points only."
+)
+
+
+def _field(block, name: str, default=None):
+    if isinstance(block, dict):
+        return block.get(name, default)
+    return getattr(block, name, default)
+
+
+def _block_text(block) -> str:
+    btype = _field(block, "type")
+    if btype == "text":
+        return _field(block, "text", "")
+    if btype == "tool_use":
+        return f"{_field(block, 'name')}({json.dumps(_field(block, 'input', {}))})"
+    if btype == "tool_result":
+        content = _field(block, "content", "")
+        return content if isinstance(content, str) else json.dumps(content, default=str)
+    return str(block)
+
+
+def message_tokens(msg: dict) -> int:
+    """Estimate the token count of a single message."""
+    content = msg["content"]
+    if isinstance(content, str):
+        chars = len(content)
+    else:
+        chars = sum(len(_block_text(b)) for b in content)
+    return chars // CHARS_PER_TOKEN + 4  # per-message framing overhead
+
+
+def count_tokens(messages: list) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def _is_turn_start(msg: dict) -> bool:
+    """A turn starts with a user message that isn't a batch of tool results."""
+    if msg["role"] != "user":
+        return False
+    content = msg["content"]
+    if isinstance(content, str):
+        return True
+    return not any(_field(b, "type") == "tool_result" for b in content)
+
+
+def _render_transcript(messages: list) -> str:
+    lines = []
+    for msg in messages:
+        content = msg["content"]
+        blocks = [{"type": "text", "text": content}] if isinstance(content, str) else content
+        for block in blocks:
+            btype = _field(block, "type")
+            if btype == "tool_use":
+                lines.append(f"Tool call: {_block_text(block)}")
+            elif btype == "tool_result":
+                lines.append(f"Tool result: {_block_text(block)}")
+            else:
+                speaker = "User" if msg["role"] == "user" else "Assistant"
+                lines.append(f"{speaker}: {_block_text(block)}")
+    return "\n".join(lines)
+
+
+@dataclass
+class ContextManager:
+    config: ContextConfig
+    model: ModelConfig
+    tracker: UsageTracker | None = None
+    chat_fn: Callable[..., ChatResult] = chat
+
+    def compact(self, messages: list) -> None:
+        """Shrink `messages` in place if it has grown past the configured limit."""
+        keep = max(1, self.config.keep_recent_turns)
+        starts = [i for i, m in enumerate(messages) if _is_turn_start(m)]
+        if len(starts) <= keep:
+            return
+        cutoff = starts[-keep]
+
+        # Leave the history alone until it is actually too big — every rewrite
+        # invalidates the prompt-cache prefix from the first changed message on
+        if count_tokens(messages) <= self.config.max_tokens:
+            return
+
+        self._elide_tool_results(messages[:cutoff])
+        if count_tokens(messages) <= self.config.max_tokens:
+            return
+
+        old, recent = messages[:cutoff], messages[cutoff:]
+        summary = self._summarise(old) if self.config.summarize else None
+        if summary:
+            first = recent[0]
+            recent[0] = {**first, "content": self._prepend(summary, first["content"])}
+            messages[:] = recent
+            return
+
+        # Sliding window — drop whole turns from the front until we fit
+        while count_tokens(messages) > self.config.max_tokens:
+            starts = [i for i, m in enumerate(messages) if _is_turn_start(m)]
+            if len(starts) <= keep:
+                break
+            del messages[:starts[1]]
+
+    def _elide_tool_results(self, messages: list) -> None:
+        limit = self.config.tool_result_max_chars
+        for msg in messages:
+            if msg["role"] != "user" or isinstance(msg["content"], str):
+                continue
+            for i, block in enumerate(msg["content"]):
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    continue
+                content = block.get("content")
+                if isinstance(content, str) and len(content) > limit:
+                    msg["content"][i] = {
+                        **block,
+                        "content": content[:limit] + f"\n... [elided {len(content) - limit:,} chars]",
+                    }
+
+    def _summarise(self, messages: list) -> str | None:
+        try:
+            result = self.chat_fn(
+                self.model,
+                system=SUMMARY_PROMPT,
+                messages=[{"role": "user", "content": _render_transcript(messages)}],
+                tools=[],
+            )
+        except Exception as e:
+            print(f"  (context summary failed: {e})")
+            return None
+        if self.tracker is not None:
+            self.tracker.record(result, model_name=self.model.name)
+        text = "\n".join(b.text for b in result.content if b.type == "text").strip()
+        return text or None
+
+    @staticmethod
+    def _prepend(summary: str, content):
+        block = f"{SUMMARY_PREFIX}\n{summary}\n\n"
+        if isinstance(content, str):
+            return block + content
+        return [{"type": "text", "text": block}] + list(content)
@@ -1,16 +1,18 @@
-import json
 from pathlib import Path
 
 from dotenv import load_dotenv
-from tools import TOOLS, execute_tool
+from tools import TOOLS, cache_summary, configure_cache, http_summary
+from agent_loop import AgentLoop
 from config import load_config
-from models import chat
+from context import ContextManager
 from usage import UsageTracker
 
 load_dotenv()
 
 cfg = load_config()
+configure_cache(cfg.cache)
 tracker = UsageTracker(budget=cfg.budget)
+context = ContextManager(config=cfg.context, model=cfg.model, tracker=tracker)
 SYSTEM_PROMPT_PATH = Path(__file__).parent / "JARVIS.md"
 
 
@@ -26,33 +28,15 @@ def agent(user_message: str, messages: list):
     print(f"{'='*60}\n")
 
     messages.append({"role": "user", "content": user_message})
-    system = load_system_prompt()
-
-    while True:
-        result = chat(cfg.model, system=system, messages=messages, tools=TOOLS)
-        tracker.record(result, model_name=cfg.model.name)
-
-        for block in result.content:
-            if block.type == "text":
-                print(f"Agent: {block.text}")
-
-        if result.stop_reason == "end_turn" or tracker.over_budget:
-            break
-
-        tool_results = []
-        for block in result.content:
-            if block.type == "tool_use":
-                print(f"  -> tool: {block.name}({json.dumps(block.input, indent=2)})")
-                res = execute_tool(block.name, block.input)
-                print(f"  <- {res[:200]}{'...' if len(res) > 200 else ''}\n")
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": block.id,
-                    "content": res,
-                })
-
-        messages.append({"role": "assistant", "content": result.content})
-        messages.append({"role": "user", "content": tool_results})
+    loop = AgentLoop(
+        model=cfg.model,
+        system=load_system_prompt(),
+        tools=TOOLS,
+        tracker=tracker,
+        max_parallel=cfg.tools.max_parallel,
+        context=context,
+    )
+    loop.run(messages)
 
 
 if __name__ == "__main__":
@@ -71,3 +55,5 @@ if __name__ == "__main__":
                 agent(user_input, conversation)
 
     print(f"\n{tracker.summary(cfg.model.name)}")
+    print(cache_summary())
+    print(http_summary())
@@ -1,6 +1,8 @@
 """Provider abstraction — route to Anthropic or OpenAI via a single chat() function."""
 
+import json
 from dataclasses import dataclass
+from typing import Iterator
 from config import ModelConfig
 
 # Cached clients (created once per provider)
@@ -9,8 +11,10 @@ _clients: dict = {}
 
 @dataclass
 class Usage:
-    input_tokens: int
+    input_tokens: int  # uncached input only
     output_tokens: int
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
 
 
 @dataclass
@@ -20,6 +24,20 @@ class ChatResult:
     usage: Usage
 
 
+@dataclass
+class StreamEvent:
+    """One event from chat_stream().
+
+    type is "text_start" (a new text block begins), "text" (a text delta),
+    "tool_use" (a tool_use block whose input is complete), or "done" (the
+    assembled ChatResult, always the last event).
+    """
+    type: str
+    text: str = ""
+    block: object = None
+    result: ChatResult | None = None
+
+
 # ---------------------------------------------------------------------------
 # Anthropic
 # ---------------------------------------------------------------------------
@@ -31,27 +49,67 @@ def _get_anthropic():
     return _clients["anthropic"]
 
 
+# Prompt caching — breakpoints on the system prompt, the tool list, and the end
+# of the message history. The prefix up to each breakpoint is reused on the next
+# iteration instead of being re-billed and re-prefilled at full price.
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def _cache_last_message(messages: list) -> list:
+    """Return a copy of `messages` with a cache breakpoint on the final content block.
+
+    The caller's history is left untouched so breakpoints don't pile up across
+    turns (the API allows at most four per request).
+    """
+    if not messages:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str) and content:
+        content = [{"type": "text", "text": content, "cache_control": _EPHEMERAL}]
+    elif isinstance(content, list) and content and isinstance(content[-1], dict):
+        content = content[:-1] + [{**content[-1], "cache_control": _EPHEMERAL}]
+    else:
+        return messages
+    return messages[:-1] + [{**last, "content": content}]
+
+
+def _anthropic_kwargs(cfg: ModelConfig, system: str, messages: list, tools: list) -> dict:
+    if cfg.prompt_cache:
+        system = [{"type": "text", "text": system, "cache_control": _EPHEMERAL}]
+        if tools:
+            tools = tools[:-1] + [{**tools[-1], "cache_control": _EPHEMERAL}]
+        messages = _cache_last_message(messages)
+    return dict(
+        model=cfg.name,
+        max_tokens=cfg.max_tokens,
+        temperature=cfg.temperature,
+        system=system,
+        tools=tools,
+        messages=messages,
+    )
+
+
+def _normalize_anthropic_response(response) -> ChatResult:
+    return ChatResult(
+        content=response.content,
+        stop_reason=response.stop_reason,
+        usage=Usage(
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+            cache_read_tokens=getattr(response.usage, "cache_read_input_tokens", None) or 0,
+            cache_write_tokens=getattr(response.usage, "cache_creation_input_tokens", None) or 0,
+        ),
+    )
+
+
 def _chat_anthropic(cfg: ModelConfig, system: str, messages: list, tools: list) -> ChatResult:
     import time
     client = _get_anthropic()
     for attempt in range(3):
         try:
-            response = client.messages.create(
-                model=cfg.name,
-                max_tokens=cfg.max_tokens,
-                temperature=cfg.temperature,
-                system=system,
-                tools=tools,
-                messages=messages,
-            )
-            return ChatResult(
-                content=response.content,
-                stop_reason=response.stop_reason,
-                usage=Usage(
-                    input_tokens=response.usage.input_tokens,
-                    output_tokens=response.usage.output_tokens,
-                ),
-            )
+            response = client.messages.create(**_anthropic_kwargs(cfg, system, messages, tools))
+            return _normalize_anthropic_response(response)
         except Exception as e:
             if "rate_limit" in str(e).lower() and attempt < 2:
                 print(f"Rate limit hit, retrying in 60s (attempt {attempt + 1}/3)...")
@@ -60,6 +118,34 @@ def _chat_anthropic(cfg: ModelConfig, system: str, messages: list, tools: list)
                 raise
 
 
+def _stream_anthropic(cfg: ModelConfig, system: str, messages: list, tools: list) -> Iterator[StreamEvent]:
+    import time
+    client = _get_anthropic()
+    for attempt in range(3):
+        started = False
+        try:
+            with client.messages.stream(**_anthropic_kwargs(cfg, system, messages, tools)) as stream:
+                for event in stream:
+                    if event.type == "content_block_start" and event.content_block.type == "text":
+                        started = True
+                        yield StreamEvent("text_start")
+                    elif event.type == "text":
+                        yield StreamEvent("text", text=event.text)
+                    elif event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                        started = True
+                        yield StreamEvent("tool_use", block=event.content_block)
+                response = stream.get_final_message()
+            yield StreamEvent("done", result=_normalize_anthropic_response(response))
+            return
+        except Exception as e:
+            # Only retry if nothing has been handed to the caller yet
+            if "rate_limit" in str(e).lower() and attempt < 2 and not started:
+                print(f"Rate limit hit, retrying in 60s (attempt {attempt + 1}/3)...")
+                time.sleep(60)
+            else:
+                raise
+
+
 # ---------------------------------------------------------------------------
 # OpenAI
 # ---------------------------------------------------------------------------
@@ -130,7 +216,6 @@ def _convert_messages_to_openai(system: str, messages: list) -> list:
                 if btype == "text":
                     text_parts.append(block.get("text", "") if isinstance(block, dict) else getattr(block, "text", ""))
                 elif btype == "tool_use":
-                    import json
                     name = block.get("name") if isinstance(block, dict) else getattr(block, "name", None)
                     bid = block.get("id") if isinstance(block, dict) else getattr(block, "id", None)
                     args = block.get("input", {}) if isinstance(block, dict) else getattr(block, "input", {})
@@ -157,8 +242,6 @@ def _convert_messages_to_openai(system: str, messages: list) -> list:
 
 def _normalize_openai_response(response) -> ChatResult:
     """Convert an OpenAI ChatCompletion into Anthropic-style ChatResult."""
-    import json
-
     choice = response.choices[0]
     msg = choice.message
     content_blocks = []
@@ -168,11 +251,7 @@ def _normalize_openai_response(response) -> ChatResult:
 
     if msg.tool_calls:
         for tc in msg.tool_calls:
-            content_blocks.append(_ToolUseBlock(
-                id=tc.id,
-                name=tc.function.name,
-                input=json.loads(tc.function.arguments),
-            ))
+            content_blocks.append(_tool_use_block(tc.id, tc.function.name, tc.function.arguments))
 
     # Map OpenAI finish_reason to Anthropic stop_reason
     stop_map = {"stop": "end_turn", "tool_calls": "tool_use"}
@@ -181,10 +260,20 @@ def _normalize_openai_response(response) -> ChatResult:
     return ChatResult(
         content=content_blocks,
         stop_reason=stop_reason,
-        usage=Usage(
-            input_tokens=response.usage.prompt_tokens,
-            output_tokens=response.usage.completion_tokens,
-        ),
+        usage=_openai_usage(response.usage),
+    )
+
+
+def _openai_usage(usage) -> Usage:
+    """OpenAI caches prompts automatically and counts cached tokens inside prompt_tokens."""
+    if usage is None:
+        return Usage(input_tokens=0, output_tokens=0)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    return Usage(
+        input_tokens=usage.prompt_tokens - cached,
+        output_tokens=usage.completion_tokens,
+        cache_read_tokens=cached,
     )
 
 
@@ -196,18 +285,31 @@ class _TextBlock:
 
 
 class _ToolUseBlock:
-    """Mimics anthropic ToolUseBlock so the agentic loop can use .type / .name / .id / .input."""
-    def __init__(self, id: str, name: str, input: dict):
+    """Mimics anthropic ToolUseBlock so the agentic loop can use .type / .name / .id / .input.
+
+    `error` is set when the model's arguments weren't valid JSON; the call is
+    answered with it instead of being run.
+    """
+    def __init__(self, id: str, name: str, input: dict, error: str | None = None):
         self.type = "tool_use"
         self.id = id
         self.name = name
         self.input = input
+        self.error = error
 
 
-def _chat_openai(cfg: ModelConfig, system: str, messages: list, tools: list) -> ChatResult:
-    import time
-    import openai
-    client = _get_openai()
+def _tool_use_block(id: str, name: str, arguments: str) -> _ToolUseBlock:
+    """Parse OpenAI's JSON-string arguments; malformed JSON becomes a tool error, not a crash."""
+    try:
+        args = json.loads(arguments or "{}")
+    except json.JSONDecodeError as e:
+        return _ToolUseBlock(id, name, {}, error=f"Error: invalid JSON arguments for {name}: {e}")
+    if not isinstance(args, dict):
+        return _ToolUseBlock(id, name, {}, error=f"Error: arguments for {name} must be a JSON object")
+    return _ToolUseBlock(id, name, args)
+
+
+def _openai_kwargs(cfg: ModelConfig, system: str, messages: list, tools: list) -> dict:
     oai_messages = _convert_messages_to_openai(system, messages)
     oai_tools = _convert_tools_to_openai(tools)
 
@@ -220,6 +322,14 @@ def _chat_openai(cfg: ModelConfig, system: str, messages: list, tools: list) ->
     )
     if kwargs["tools"] is None:
         del kwargs["tools"]
+    return kwargs
+
+
+def _chat_openai(cfg: ModelConfig, system: str, messages: list, tools: list) -> ChatResult:
+    import time
+    import openai
+    client = _get_openai()
+    kwargs = _openai_kwargs(cfg, system, messages, tools)
 
     for attempt in range(3):
         try:
@@ -233,6 +343,87 @@ def _chat_openai(cfg: ModelConfig, system: str, messages: list, tools: list) ->
                 raise
 
 
+def _stream_openai(cfg: ModelConfig, system: str, messages: list, tools: list) -> Iterator[StreamEvent]:
+    """Stream a chat completion, assembling tool_calls argument fragments by index.
+
+    OpenAI streams tool calls one after another, so a call is complete as
+    soon as a higher index shows up (or the stream ends).
+    """
+    import time
+    import openai
+    client = _get_openai()
+    kwargs = _openai_kwargs(cfg, system, messages, tools)
+    kwargs["stream"] = True
+    kwargs["stream_options"] = {"include_usage": True}
+
+    for attempt in range(3):
+        try:
+            stream = client.chat.completions.create(**kwargs)
+            break
+        except openai.RateLimitError:
+            if attempt < 2:
+                print(f"Rate limit hit, retrying in 60s (attempt {attempt + 1}/3)...")
+                time.sleep(60)
+            else:
+                raise
+
+    text_parts: list[str] = []
+    calls: dict[int, dict] = {}
+    blocks: list[_ToolUseBlock] = []
+    finish_reason = None
+    usage = None
+
+    def complete(index: int) -> _ToolUseBlock:
+        call = calls.pop(index)
+        block = _tool_use_block(call["id"], call["name"], call["arguments"])
+        blocks.append(block)
+        return block
+
+    for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        delta = choice.delta
+
+        if delta.content:
+            if not text_parts:
+                yield StreamEvent("text_start")
+            text_parts.append(delta.content)
+            yield StreamEvent("text", text=delta.content)
+
+        for tc in delta.tool_calls or []:
+            if tc.index not in calls:
+                for index in sorted(i for i in calls if i < tc.index):
+                    yield StreamEvent("tool_use", block=complete(index))
+                calls[tc.index] = {"id": tc.id, "name": "", "arguments": ""}
+            call = calls[tc.index]
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function:
+                call["name"] += tc.function.name or ""
+                call["arguments"] += tc.function.arguments or ""
+
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+
+    for index in sorted(calls):
+        yield StreamEvent("tool_use", block=complete(index))
+
+    content_blocks: list = []
+    if text_parts:
+        content_blocks.append(_TextBlock("".join(text_parts)))
+    content_blocks.extend(blocks)
+
+    stop_map = {"stop": "end_turn", "tool_calls": "tool_use"}
+    yield StreamEvent("done", result=ChatResult(
+        content=content_blocks,
+        stop_reason=stop_map.get(finish_reason, "end_turn"),
+        usage=_openai_usage(usage),
+    ))
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -245,3 +436,18 @@ def chat(cfg: ModelConfig, system: str, messages: list, tools: list) -> ChatResu
         return _chat_openai(cfg, system, messages, tools)
     else:
         raise ValueError(f"Unknown provider: {cfg.provider}")
+
+
+def chat_stream(cfg: ModelConfig, system: str, messages: list, tools: list) -> Iterator[StreamEvent]:
+    """Streaming variant of chat().
+
+    Yields text deltas as they arrive and each tool_use block as soon as its
+    input is complete, then a final "done" event carrying the same ChatResult
+    chat() would have returned.
+    """
+    if cfg.provider == "anthropic":
+        return _stream_anthropic(cfg, system, messages, tools)
+    elif cfg.provider == "openai":
+        return _stream_openai(cfg, system, messages, tools)
+    else:
+        raise ValueError(f"Unknown provider: {cfg.provider}")
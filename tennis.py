@@ -9,16 +9,22 @@ Usage:
     python3 tennis.py --after 9         # only slots starting at or after 9am
     python3 tennis.py --before 18       # only slots starting before 6pm
     python3 tennis.py --court alice     # filter by court name
+    python3 tennis.py --changes         # only slots opened since the last --changes run (first run records a baseline)
+    python3 tennis.py --max-age 0       # ignore the local store and refetch everything
 """
 
-import urllib.request
-import urllib.error
 import json
 import shutil
+import sqlite3
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from pathlib import Path
 import argparse
 
+import httpx
+
 _COLOR = sys.stdout.isatty()
 
 def _c(*codes: int) -> str:
@@ -63,19 +69,202 @@ COURTS = {
 
 API_BASE = "https://api.rec.us/v1/locations"
 
+# Parallel requests for a court × day grid (tools/_http caps each host at 8 too)
+MAX_WORKERS = 8
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+def _get_schedule(location_id: str, day: date) -> dict:
+    # Imported here: tools/check_tennis imports this module while the tools package loads
+    from tools import _http
 
-def fetch_schedule(location_id: str, day: date) -> dict:
     url = f"{API_BASE}/{location_id}/schedule?startDate={day.strftime('%Y-%m-%d')}"
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    try:
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return json.loads(resp.read())
-    except urllib.error.HTTPError as e:
-        print(f"  HTTP {e.code}: {url}", file=sys.stderr)
-        return {}
-    except Exception as e:
-        print(f"  Error: {e}", file=sys.stderr)
-        return {}
+    resp = _http.get(url, headers=HEADERS, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _describe_error(e: Exception) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"HTTP {e.response.status_code}"
+    return str(e) or type(e).__name__
+
+
+def _fetch_cells(
+    cells: list[tuple[str, date]],
+    max_workers: int = MAX_WORKERS,
+) -> tuple[dict[tuple[str, date], dict], dict[tuple[str, date], str]]:
+    """Fetch (location_id, day) cells concurrently over pooled connections.
+
+    Returns (schedules, errors), both keyed by cell. A failed cell lands in
+    `errors` instead of sinking the rest of the grid.
+    """
+    schedules: dict[tuple[str, date], dict] = {}
+    errors: dict[tuple[str, date], str] = {}
+    if not cells:
+        return schedules, errors
+
+    def fetch(cell):
+        try:
+            return cell, _get_schedule(*cell), None
+        except Exception as e:
+            return cell, None, _describe_error(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(cells)))) as pool:
+        for cell, data, error in pool.map(fetch, cells):
+            if error is None:
+                schedules[cell] = data
+            else:
+                errors[cell] = error
+
+    return schedules, errors
+
+
+# ---------------------------------------------------------------------------
+# Local schedule store
+# ---------------------------------------------------------------------------
+
+STORE_PATH = Path.home() / ".cache" / "jarvis" / "tennis.db"
+
+# Stored days younger than this are served without hitting api.rec.us
+MAX_AGE_MINUTES = 15
+
+
+class ScheduleStore:
+    """SQLite store of fetched schedules keyed by (location_id, day).
+
+    `data` is the latest fetch. `checks` holds, per consumer (the CLI's
+    --changes, the check_tennis tool), the snapshot its last changes-check
+    saw, which is what "newly opened" is measured against — so one consumer
+    checking doesn't use up the other's diff.
+    """
+
+    def __init__(self, path: Path = STORE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schedules (
+                location_id TEXT NOT NULL,
+                day         TEXT NOT NULL,
+                fetched_at  REAL NOT NULL,
+                data        TEXT NOT NULL,
+                PRIMARY KEY (location_id, day)
+            )
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checks (
+                consumer    TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                day         TEXT NOT NULL,
+                data        TEXT NOT NULL,
+                PRIMARY KEY (consumer, location_id, day)
+            )
+            """
+        )
+        # Past days are never looked at again
+        self.conn.execute("DELETE FROM schedules WHERE day < ?", (date.today().isoformat(),))
+        self.conn.execute("DELETE FROM checks WHERE day < ?", (date.today().isoformat(),))
+        self.conn.commit()
+
+    def __enter__(self) -> "ScheduleStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.conn.close()
+
+    def get(self, location_id: str, day: date) -> tuple[dict, float] | None:
+        row = self.conn.execute(
+            "SELECT data, fetched_at FROM schedules WHERE location_id = ? AND day = ?",
+            (location_id, day.isoformat()),
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put(self, location_id: str, day: date, data: dict) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO schedules (location_id, day, fetched_at, data) VALUES (?, ?, ?, ?)
+            ON CONFLICT (location_id, day) DO UPDATE SET fetched_at = excluded.fetched_at, data = excluded.data
+            """,
+            (location_id, day.isoformat(), time.time(), json.dumps(data)),
+        )
+        self.conn.commit()
+
+    def mark_checked(self, consumer: str, location_id: str, day: date, data: dict) -> dict | None:
+        """Record `data` as what `consumer` has seen and return its previous snapshot."""
+        row = self.conn.execute(
+            "SELECT data FROM checks WHERE consumer = ? AND location_id = ? AND day = ?",
+            (consumer, location_id, day.isoformat()),
+        ).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checks (consumer, location_id, day, data) VALUES (?, ?, ?, ?)",
+            (consumer, location_id, day.isoformat(), json.dumps(data)),
+        )
+        self.conn.commit()
+        return json.loads(row[0]) if row else None
+
+
+def load_grid(
+    store: ScheduleStore,
+    location_ids: list[str],
+    dates: list[date],
+    max_age_minutes: float = MAX_AGE_MINUTES,
+) -> tuple[dict[tuple[str, date], dict], dict[tuple[str, date], str]]:
+    """The location × day grid, refetching only days whose stored copy is too old.
+
+    If a refresh fails, the stale copy is still returned alongside the error.
+    """
+    cutoff = time.time() - max_age_minutes * 60
+    schedules: dict[tuple[str, date], dict] = {}
+    stale: list[tuple[str, date]] = []
+
+    for loc in location_ids:
+        for day in dates:
+            stored = store.get(loc, day)
+            if stored is not None:
+                schedules[(loc, day)] = stored[0]
+            if stored is None or stored[1] < cutoff:
+                stale.append((loc, day))
+
+    fetched, errors = _fetch_cells(stale)
+    for (loc, day), data in fetched.items():
+        store.put(loc, day, data)
+        schedules[(loc, day)] = data
+
+    return schedules, errors
+
+
+def new_slots(
+    store: ScheduleStore, schedules: dict[tuple[str, date], dict], consumer: str
+) -> tuple[dict[tuple[str, date], list[dict]], bool]:
+    """Slots present now that weren't there at `consumer`'s previous changes-check.
+
+    A (court, day) with no previous snapshot only records a baseline — it
+    reports nothing rather than every slot as new. Returns (opened, whether
+    any cell had a baseline to compare against).
+    """
+    opened: dict[tuple[str, date], list[dict]] = {}
+    compared = False
+    for (loc, day), data in schedules.items():
+        before = store.mark_checked(consumer, loc, day, data)
+        if before is None:
+            continue
+        compared = True
+        seen = {(s["court_number"], s["start"], s["end"]) for s in parse_slots(before, day)}
+        fresh = [s for s in parse_slots(data, day) if (s["court_number"], s["start"], s["end"]) not in seen]
+        if fresh:
+            opened[(loc, day)] = fresh
+    return opened, compared
+
+
+def court_name(location_id: str) -> str:
+    for name, info in COURTS.items():
+        if info["id"] == location_id:
+            return name
+    return location_id
 
 
 def parse_slots(schedule_data: dict, day: date) -> list[dict]:
@@ -127,19 +316,29 @@ def check_availability(
     after_hour: float = 0,
     before_hour: float = 24,
     court_filter=None,
+    max_age_minutes: float = MAX_AGE_MINUTES,
+    changes: bool = False,
 ) -> None:
     today = date.today()
     dates = [today + timedelta(days=i) for i in range(days)]
 
     results: dict[str, list[tuple[date, list[dict]]]] = {}
 
-    for name, info in COURTS.items():
-        if court_filter and court_filter.lower() not in name.lower():
-            continue
+    courts = {
+        name: info for name, info in COURTS.items()
+        if not court_filter or court_filter.lower() in name.lower()
+    }
+    with ScheduleStore() as store:
+        schedules, errors = load_grid(store, [info["id"] for info in courts.values()], dates, max_age_minutes)
+        opened, compared = new_slots(store, schedules, "cli") if changes else (None, True)
+
+    for name, info in courts.items():
         results[name] = []
         for day in dates:
-            data  = fetch_schedule(info["id"], day)
-            slots = parse_slots(data, day)
+            if opened is not None:
+                slots = opened.get((info["id"], day), [])
+            else:
+                slots = parse_slots(schedules.get((info["id"], day), {}), day)
             slots = [s for s in slots if after_hour <= s["start_hour"] < before_hour]
             if slots:
                 results[name].append((day, slots))
@@ -150,12 +349,24 @@ def check_availability(
     if days > 1:
         end_day = today + timedelta(days=days - 1)
         date_range = f"  {dim(today.strftime('%b %-d') + ' → ' + end_day.strftime('%b %-d'))}"
+    title = "SF TENNIS — NEW SINCE LAST CHECK" if changes else "SF TENNIS"
     print()
-    print(rule(f"{cyan(bold('SF TENNIS'))}{date_range}"))
+    print(rule(f"{cyan(bold(title))}{date_range}"))
     print()
 
+    if errors:
+        for (loc, day), error in errors.items():
+            label = f"Could not fetch {court_name(loc)} {day.strftime('%a %b %-d')}: {error}"
+            print(f"  {dim(label)}")
+        print()
+
+    if not compared:
+        print(f"  {dim('No previous --changes run to compare against — baseline recorded.')}")
+        print()
+        return
+
     if not any_found:
-        print(f"  {dim('No reservable slots found.')}")
+        print(f"  {dim('No newly opened slots.' if changes else 'No reservable slots found.')}")
         print()
         return
 
@@ -189,6 +400,10 @@ def main() -> None:
                         help="Slots starting before this hour (24h)")
     parser.add_argument("--court",  type=str, default=None,
                         help="Filter: alice | lafayette | moscone")
+    parser.add_argument("--max-age", type=float, default=MAX_AGE_MINUTES, metavar="MIN",
+                        help=f"Refetch stored days older than this (default: {MAX_AGE_MINUTES})")
+    parser.add_argument("--changes", action="store_true",
+                        help="Only show slots opened since the last --changes run")
     args = parser.parse_args()
 
     check_availability(
@@ -196,6 +411,8 @@ def main() -> None:
         after_hour=args.after,
         before_hour=args.before,
         court_filter=args.court,
+        max_age_minutes=args.max_age,
+        changes=args.changes,
     )
 
 
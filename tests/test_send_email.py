@@ -0,0 +1,126 @@
+"""send_email against a local SMTP stand-in that requires AUTH, as Gmail does."""
+
+import smtplib
+import socketserver
+import threading
+
+import pytest
+
+import tools.send_email as send_email
+
+
+class _StandIn(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP: EHLO advertising AUTH, AUTH PLAIN, and 530 for unauthenticated MAIL."""
+
+    def handle(self):
+        log = self.server.log
+        authed = False
+        in_data = False
+        self._reply("220 stand-in ESMTP")
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.delivered += 1
+                    if self.server.drop_after_data:
+                        return  # hang up before confirming, as a flaky link would
+                    self._reply("250 queued")
+                continue
+            verb = line.split(" ", 1)[0].lower()
+            log.append(verb)
+            if verb in ("ehlo", "helo"):
+                self._reply("250-stand-in", "250-AUTH PLAIN", "250 8BITMIME")
+            elif verb == "auth":
+                authed = True
+                self._reply("235 authenticated")
+            elif verb == "mail":
+                self._reply("250 ok" if authed else "530 5.7.0 Authentication Required")
+            elif verb == "rcpt" and self.server.reject_rcpt:
+                self._reply("550 5.1.1 no such user")
+            elif verb in ("rcpt", "rset", "noop"):
+                self._reply("250 ok")
+            elif verb == "data":
+                in_data = True
+                self._reply("354 go ahead")
+            elif verb == "quit":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("502 not implemented")
+
+    def _reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+
+@pytest.fixture
+def smtp_server(monkeypatch, tmp_path):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _StandIn)
+    server.daemon_threads = True
+    server.log, server.delivered = [], 0
+    server.drop_after_data = server.reject_rcpt = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setenv("EMAIL_ADDRESS", "me@example.com")
+    monkeypatch.setenv("EMAIL_APP_PASSWORD", "secret")
+    monkeypatch.setenv("EMAIL_SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("EMAIL_SMTP_PORT", str(server.server_address[1]))
+    monkeypatch.setattr(send_email, "OUTBOX_DIR", tmp_path / "outbox")
+    monkeypatch.setattr(send_email, "RETRY_BACKOFF_SECONDS", 0)
+    send_email._session.close()
+    yield server
+    send_email._session.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_plain_connection_logs_in(smtp_server, monkeypatch):
+    monkeypatch.setenv("EMAIL_SMTP_TLS", "0")
+
+    result = send_email.execute("you@example.com", "hi", "body", skip_confirm=True)
+
+    assert result == "Email sent to you@example.com"
+    assert smtp_server.log[:3] == ["ehlo", "auth", "mail"]
+    assert smtp_server.delivered == 1
+
+
+def test_starttls_connection_logs_in(smtp_server, monkeypatch):
+    def fake_starttls(self, *args, **kwargs):
+        # What smtplib does after a successful handshake (RFC 3207): forget the EHLO features
+        self.ehlo_or_helo_if_needed()
+        self.helo_resp = self.ehlo_resp = None
+        self.esmtp_features = {}
+        self.does_esmtp = False
+        return (220, b"ready")
+
+    monkeypatch.setenv("EMAIL_SMTP_TLS", "1")
+    monkeypatch.setattr(smtplib.SMTP, "starttls", fake_starttls)
+
+    result = send_email.execute("you@example.com", "hi", "body", skip_confirm=True)
+
+    assert result == "Email sent to you@example.com"
+    assert "auth" in smtp_server.log
+    assert smtp_server.log.index("auth") < smtp_server.log.index("mail")
+
+
+def test_rejected_message_is_spooled(smtp_server, monkeypatch):
+    monkeypatch.setenv("EMAIL_SMTP_TLS", "0")
+    smtp_server.reject_rcpt = True
+
+    result = send_email.execute("nobody@example.com", "hi", "body", skip_confirm=True, spool_on_failure=True)
+
+    assert result.startswith("Failed to send email:")
+    assert "queued in" in result
+    assert len(list(send_email.OUTBOX_DIR.glob("*.eml"))) == 1
+
+
+def test_no_retry_after_data(smtp_server, monkeypatch):
+    monkeypatch.setenv("EMAIL_SMTP_TLS", "0")
+    smtp_server.drop_after_data = True
+
+    result = send_email.execute("you@example.com", "hi", "body", skip_confirm=True, spool_on_failure=True)
+
+    assert "may have been delivered" in result
+    assert smtp_server.delivered == 1
+    assert smtp_server.log.count("mail") == 1
+    assert not send_email.OUTBOX_DIR.exists()
@@ -1,17 +1,88 @@
 import inspect
+import time
+from config import CacheConfig
+from tools._cache import ToolCache
+from tools._http import summary as http_summary
 from tools import bash, read_email, read_file, read_imessage, search_web, send_email, send_imessage, web_fetch, write_file, polymarket_search, polymarket_movers, polymarket_dashboard, polymarket_recommend, trends_search, trends_related, trends_trending, get_weather, check_tennis
 
 _modules = [bash, read_email, read_file, read_imessage, search_web, send_email, send_imessage, web_fetch, write_file, polymarket_search, polymarket_movers, polymarket_dashboard, polymarket_recommend, trends_search, trends_related, trends_trending, get_weather, check_tennis]
 
 TOOLS = [m.schema for m in _modules]
 
-_registry = {m.schema["name"]: m.execute for m in _modules}
+MAX_PARALLEL = 8
 
 
-def execute_tool(name: str, input: dict) -> str:
-    func = _registry.get(name)
+def registry_for(modules: list) -> dict:
+    """Map tool name → execute function for a subset of tool modules."""
+    return {m.schema["name"]: m.execute for m in modules}
+
+
+_registry = registry_for(_modules)
+
+# Seconds each tool's result stays fresh; 0 (the default) means never cached
+_ttls = {m.schema["name"]: getattr(m, "cache_ttl", 0) for m in _modules}
+
+# Read-only tools declare parallel_safe = True and may run alongside each other.
+# Everything else (sends with input() confirmations, writes, bash) runs alone,
+# in the order the model asked for it.
+_parallel_safe = {m.schema["name"] for m in _modules if getattr(m, "parallel_safe", False)}
+
+cache: ToolCache | None = ToolCache()
+
+
+def configure_cache(cfg: CacheConfig) -> None:
+    """Replace the default in-memory tool cache according to config.toml."""
+    global cache
+    cache = ToolCache(max_entries=cfg.max_entries, db_path=cfg.path or None) if cfg.enabled else None
+
+
+def parallel_safe(name: str) -> bool:
+    return name in _parallel_safe
+
+
+def cacheable(name: str) -> bool:
+    return _ttls.get(name, 0) > 0
+
+
+def cache_summary() -> str:
+    return cache.summary() if cache is not None else "Tool cache: disabled"
+
+
+def _cache_key(name: str, sig: inspect.Signature, args: dict) -> str | None:
+    """Normalise inputs so e.g. get_weather() and get_weather(location="all") share an entry."""
+    try:
+        bound = sig.bind(**args)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    normalised = {k: v.strip() if isinstance(v, str) else v for k, v in bound.arguments.items()}
+    return ToolCache.key(name, normalised)
+
+
+def execute_tool(name: str, input: dict, registry: dict | None = None, use_cache: bool = True) -> str:
+    func = (_registry if registry is None else registry).get(name)
     if func is None:
         return f"Unknown tool: {name}"
     sig = inspect.signature(func)
     valid = {k: v for k, v in input.items() if k in sig.parameters}
-    return func(**valid)
+
+    ttl = _ttls.get(name, 0)
+    key = _cache_key(name, sig, valid) if use_cache and ttl > 0 and cache is not None else None
+    if key is None:
+        return func(**valid)
+
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    res = func(**valid)
+    cache.put(key, res, ttl)
+    return res
+
+
+def timed_call(execute, block) -> tuple[str, float]:
+    """Run one tool_use block through `execute`, returning (result, seconds)."""
+    if getattr(block, "error", None):
+        return block.error, 0.0  # arguments didn't parse — tell the model instead of running it
+    start = time.perf_counter()
+    res = execute(block.name, block.input)
+    return res, time.perf_counter() - start
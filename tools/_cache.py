@@ -0,0 +1,85 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Results that look like failures are never cached — retrying should actually retry
+ERROR_PREFIXES = ("Error", "Failed", "Search failed", "Fetch failed", "Unknown tool")
+# ...nor are partial results that report failed parts (get_weather, check_tennis)
+ERROR_SECTIONS = ("\nErrors: ", "\nCould not fetch:")
+
+
+class ToolCache:
+    """TTL cache for tool results: in-memory LRU, optionally backed by SQLite.
+
+    The SQLite store lets separate processes (REPL sessions, cron briefings)
+    share results that are still fresh.
+    """
+
+    def __init__(self, max_entries: int = 256, db_path: str | Path | None = None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._mem: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            path = Path(db_path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM tool_cache WHERE expires < ?", (time.time(),))
+            self._db.commit()
+
+    @staticmethod
+    def key(name: str, args: dict) -> str:
+        return f"{name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and entry[0] > now:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires FROM tool_cache WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+                if row:
+                    self._remember(key, row[1], row[0])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str, ttl: float) -> None:
+        if not isinstance(value, str) or value.startswith(ERROR_PREFIXES):
+            return
+        if any(section in value for section in ERROR_SECTIONS):
+            return
+        expires = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tool_cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, value, expires),
+                )
+                self._db.commit()
+
+    def summary(self) -> str:
+        return f"Tool cache: {self.hits} hits / {self.misses} misses"
+
+    def _remember(self, key: str, expires: float, value: str) -> None:
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
@@ -0,0 +1,186 @@
+"""Warm workers for the polymarket and trends CLIs.
+
+Spawning `polymarket` or `trends` per tool call pays interpreter startup and
+their pandas/numpy/rich imports every time — often a second or more. Instead
+each program gets a small pool of long-lived `tools._cli_worker` processes
+that import the CLI once and run commands in-process, speaking JSON lines
+over stdin/stdout. A worker runs out of process so the CLI's stdout capture
+never touches the agent's threads. If the package isn't importable or a
+worker dies, calls fall back to running the installed script as before.
+"""
+
+import atexit
+import json
+import select
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+WORKERS_PER_PROGRAM = 2
+STARTUP_TIMEOUT = 30
+CALL_TIMEOUT = 30
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+class _Worker:
+    def __init__(self, program: str):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "tools._cli_worker", program],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            cwd=_ROOT,
+        )
+
+    def _read(self, timeout: float) -> dict | None:
+        ready, _, _ = select.select([self.proc.stdout], [], [], timeout)
+        if not ready:
+            return None
+        line = self.proc.stdout.readline()
+        return json.loads(line) if line else None
+
+    def wait_ready(self) -> None:
+        hello = self._read(STARTUP_TIMEOUT)
+        if not hello or not hello.get("ready"):
+            self.close()
+            raise RuntimeError((hello or {}).get("error", "worker did not start"))
+
+    def call(self, args: list[str], timeout: float) -> dict:
+        self.proc.stdin.write(json.dumps({"args": args}) + "\n")
+        self.proc.stdin.flush()
+        reply = self._read(timeout)
+        if reply is None:
+            if self.proc.poll() is None:
+                raise subprocess.TimeoutExpired(args, timeout)
+            raise OSError("worker exited")
+        return reply
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+class _Pool:
+    """Up to WORKERS_PER_PROGRAM workers for one program, handed out one call at a time."""
+
+    def __init__(self, program: str):
+        self.program = program
+        self.idle: list[_Worker] = []
+        self.count = 0
+        self.unavailable = False
+        self.cond = threading.Condition()
+
+    def acquire(self) -> _Worker | None:
+        """An idle or freshly started worker, or None when workers can't run."""
+        with self.cond:
+            while True:
+                if self.unavailable:
+                    return None
+                if self.idle:
+                    return self.idle.pop()
+                if self.count < WORKERS_PER_PROGRAM:
+                    self.count += 1
+                    break
+                self.cond.wait()
+        try:
+            worker = _Worker(self.program)
+            worker.wait_ready()
+        except (OSError, RuntimeError, ValueError):
+            with self.cond:
+                self.count -= 1
+                self.unavailable = True
+                self.cond.notify_all()
+            return None
+        return worker
+
+    def release(self, worker: _Worker, healthy: bool = True) -> None:
+        with self.cond:
+            if healthy:
+                self.idle.append(worker)
+            else:
+                self.count -= 1
+            self.cond.notify()
+        if not healthy:
+            worker.close()
+
+    def close(self) -> None:
+        with self.cond:
+            idle, self.idle = self.idle, []
+        for worker in idle:
+            worker.close()
+
+
+_pools: dict[str, _Pool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(program: str) -> _Pool:
+    with _pools_lock:
+        if program not in _pools:
+            _pools[program] = _Pool(program)
+        return _pools[program]
+
+
+@atexit.register
+def _shutdown() -> None:
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+def warm(*programs: str) -> None:
+    """Start one worker per program in the background so the first call finds it ready."""
+    for program in programs:
+        pool = _pool(program)
+
+        def start(pool=pool):
+            worker = pool.acquire()
+            if worker is not None:
+                pool.release(worker)
+
+        threading.Thread(target=start, name=f"cli-warm-{program}", daemon=True).start()
+
+
+def run_cli(program: str, args: list[str], timeout: float = CALL_TIMEOUT) -> subprocess.CompletedProcess:
+    """Run `program args...` through a warm worker, falling back to a subprocess.
+
+    Returns a CompletedProcess either way, so callers read stdout/stderr as
+    they would from subprocess.run. Raises subprocess.TimeoutExpired on timeout.
+    """
+    pool = _pool(program)
+    worker = pool.acquire()
+    if worker is not None:
+        try:
+            reply = worker.call(args, timeout)
+        except subprocess.TimeoutExpired:
+            pool.release(worker, healthy=False)
+            raise
+        except (OSError, ValueError):
+            pool.release(worker, healthy=False)
+        else:
+            pool.release(worker)
+            return subprocess.CompletedProcess(
+                [program, *args], reply["exit_code"], reply["stdout"], reply["stderr"]
+            )
+    return subprocess.run([program, *args], capture_output=True, text=True, timeout=timeout)
+
+
+def cli_output(result: subprocess.CompletedProcess, empty: str = "No results.") -> str:
+    """A tool's answer from a run_cli result: stdout, or "Error: ..." when the CLI failed.
+
+    The prefix is what keeps a failure out of the tool cache — stderr must
+    never come back looking like a successful result.
+    """
+    if result.returncode != 0:
+        # Last line with any words in it, minus the box rich draws around typer errors
+        lines = [line.strip(" │╭╮╰╯─") for line in (result.stderr or result.stdout).splitlines()]
+        lines = [line for line in lines if any(c.isalnum() for c in line)]
+        detail = lines[-1].removeprefix("Error: ") if lines else f"exit status {result.returncode}"
+        return f"Error: {result.args[0]} failed — {detail}"
+    return result.stdout.strip() or empty
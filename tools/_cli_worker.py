@@ -0,0 +1,70 @@
+"""Long-lived worker that runs one installed CLI in-process.
+
+Started by tools/_cli.py as `python -m tools._cli_worker <program>`. It
+imports the program's console_scripts entry point once — paying the
+pandas/numpy/rich import cost a single time — then reads JSON requests
+({"args": [...]}) from stdin and answers each with one JSON line
+({"stdout", "stderr", "exit_code"}) on stdout. The first line it writes is
+{"ready": true} or {"error": "..."}.
+"""
+
+import json
+import os
+import sys
+import traceback
+from importlib.metadata import entry_points
+
+
+def _load_command(program: str):
+    """The click command behind a console script (typer apps are converted)."""
+    matches = entry_points(group="console_scripts", name=program)
+    if not matches:
+        raise LookupError(f"no console script named '{program}' is installed")
+    target = next(iter(matches)).load()
+    try:
+        import typer
+        from typer.main import get_command
+    except ImportError:
+        typer = None
+    if typer is not None and isinstance(target, typer.Typer):
+        return get_command(target)
+    import click
+    if isinstance(target, click.Command):
+        return target
+    raise TypeError(f"'{program}' entry point is not a click or typer command")
+
+
+def main() -> None:
+    program = sys.argv[1]
+    # Keep the protocol on a private copy of stdout; anything the CLI prints
+    # outside the runner's capture lands on stderr instead of corrupting it.
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+
+    def reply(payload: dict) -> None:
+        protocol.write(json.dumps(payload) + "\n")
+        protocol.flush()
+
+    try:
+        from click.testing import CliRunner
+        command = _load_command(program)
+    except Exception as e:
+        reply({"error": f"{type(e).__name__}: {e}"})
+        return
+    reply({"ready": True})
+
+    runner = CliRunner()
+    for line in sys.stdin:
+        try:
+            args = json.loads(line)["args"]
+            result = runner.invoke(command, args, prog_name=program, env={"COLUMNS": "200"})
+            stderr = result.stderr
+            if result.exception is not None and not isinstance(result.exception, SystemExit):
+                stderr += "".join(traceback.format_exception(result.exception)[-1:])
+            reply({"stdout": result.stdout, "stderr": stderr, "exit_code": result.exit_code})
+        except Exception as e:
+            reply({"stdout": "", "stderr": f"{type(e).__name__}: {e}", "exit_code": 1})
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,31 @@ import glob
 import os
 import re
 import sqlite3
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from functools import lru_cache
 
 ADDRESSBOOK_DIR = os.path.expanduser("~/Library/Application Support/AddressBook/Sources")
+CHAT_DB_PATH = os.path.expanduser("~/Library/Messages/chat.db")
 
+# How often the AddressBook files and chat.db are stat'ed for changes
+RECHECK_SECONDS = 5
 
+# Per-token match scores for search_contacts
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+TYPO_SCORES = {1: 0.6, 2: 0.4}
+FULL_NAME_BONUS = 0.2
+# Recent conversations break ties: up to this much, halving every RECENCY_HALF_LIFE_DAYS
+RECENCY_BONUS = 0.3
+RECENCY_HALF_LIFE_DAYS = 30
+COCOA_EPOCH = 978307200
+
+
+@lru_cache(maxsize=4096)
 def _normalize_phone(number: str) -> str:
     """Strip a phone number down to digits (with leading +)."""
     digits = re.sub(r"[^\d+]", "", number)
@@ -18,59 +39,140 @@ def _normalize_phone(number: str) -> str:
     return digits
 
 
-def resolve_contact(name: str) -> list[dict]:
-    """Search all AddressBook sources for contacts matching `name`.
+def _fold(text: str) -> str:
+    """Casefold and strip diacritics: 'José Núñez' → 'jose nunez'."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
 
-    Returns a list of {"name": str, "phone": str} dicts, deduplicated by
-    normalized phone number.
+
+def _name_tokens(name: str) -> list[str]:
+    return re.findall(r"\w+", _fold(name))
+
+
+def _deletes(token: str) -> set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment distance (adjacent swaps count once), capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _typo_limit(token: str) -> int:
+    if len(token) >= 8:
+        return 2
+    return 1 if len(token) >= 4 else 0
+
+
+@dataclass
+class ContactIndex:
+    """Every AddressBook phone number, loaded once and keyed for lookups.
+
+    `contacts` holds one {"name", "phone"} entry per normalised phone number
+    (first source wins, as before); `by_phone` maps phone → name and
+    `by_token` maps each folded name word → indices into `contacts`.
+    `vocab` (sorted) and `deletes` (one-character deletions → words) back
+    prefix and typo matching in search_contacts.
     """
-    pattern = os.path.join(ADDRESSBOOK_DIR, "*/AddressBook-v22.abcddb")
-    db_paths = glob.glob(pattern)
 
-    seen_phones: set[str] = set()
-    results: list[dict] = []
+    contacts: list[dict] = field(default_factory=list)
+    by_phone: dict[str, str] = field(default_factory=dict)
+    by_token: dict[str, list[int]] = field(default_factory=dict)
+    tokens: list[tuple[str, ...]] = field(default_factory=list)
+    folded: list[str] = field(default_factory=list)
+    vocab: list[str] = field(default_factory=list)
+    deletes: dict[str, set[str]] = field(default_factory=dict)
 
-    for db_path in db_paths:
-        try:
-            conn = sqlite3.connect(db_path)
-            cur = conn.cursor()
-            # Search first name, last name, or combined
-            cur.execute(
-                """
-                SELECT
-                    COALESCE(r.ZFIRSTNAME, '') || ' ' || COALESCE(r.ZLASTNAME, '') AS full_name,
-                    p.ZFULLNUMBER
-                FROM ZABCDRECORD r
-                JOIN ZABCDPHONENUMBER p ON p.ZOWNER = r.Z_PK
-                WHERE r.ZFIRSTNAME LIKE ? OR r.ZLASTNAME LIKE ?
-                   OR (COALESCE(r.ZFIRSTNAME, '') || ' ' || COALESCE(r.ZLASTNAME, '')) LIKE ?
-                """,
-                (f"%{name}%", f"%{name}%", f"%{name}%"),
-            )
-            for full_name, phone in cur.fetchall():
-                normalized = _normalize_phone(phone)
-                if normalized and normalized not in seen_phones:
-                    seen_phones.add(normalized)
-                    results.append({"name": full_name.strip(), "phone": normalized})
-            conn.close()
-        except Exception:
-            continue
+    def add(self, name: str, phone: str) -> None:
+        normalized = _normalize_phone(phone)
+        if not normalized or normalized in self.by_phone:
+            return
+        name = name.strip()
+        tokens = tuple(_name_tokens(name))
+        self.by_phone[normalized] = name
+        for token in set(tokens):
+            self.by_token.setdefault(token, []).append(len(self.contacts))
+        self.contacts.append({"name": name, "phone": normalized})
+        self.tokens.append(tokens)
+        self.folded.append(_fold(name))
 
-    return results
+    def finish(self) -> None:
+        """Build the word-level lookup structures once every contact is in."""
+        self.vocab = sorted(self.by_token)
+        for token in self.vocab:
+            for variant in _deletes(token):
+                self.deletes.setdefault(variant, set()).add(token)
 
+    def with_prefix(self, prefix: str) -> list[str]:
+        """Index words starting with `prefix`, from the sorted vocabulary."""
+        words = []
+        for token in self.vocab[bisect_left(self.vocab, prefix):]:
+            if not token.startswith(prefix):
+                break
+            words.append(token)
+        return words
+
+    def token_matches(self, query: str) -> dict[str, float]:
+        """Index words matching one query word → score (exact, prefix or typo)."""
+        matches = {token: EXACT_SCORE if token == query else PREFIX_SCORE for token in self.with_prefix(query)}
+
+        limit = _typo_limit(query)
+        if limit:
+            # Symmetric-delete candidates: words within one deletion of the query
+            candidates = set(self.deletes.get(query, ()))
+            for variant in _deletes(query):
+                candidates.add(variant)
+                candidates |= self.deletes.get(variant, set())
+            for token in candidates:
+                if token in matches or token not in self.by_token:
+                    continue
+                distance = _edit_distance(query, token, limit)
+                if distance <= limit:
+                    matches[token] = TYPO_SCORES[distance]
+        return matches
+
+
+_index: ContactIndex | None = None
+_index_key: tuple | None = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
 
-def reverse_lookup(phone_numbers: list[str]) -> dict[str, str]:
-    if not phone_numbers:
-        return {}
 
-    pattern = os.path.join(ADDRESSBOOK_DIR, "*/AddressBook-v22.abcddb")
-    db_paths = glob.glob(pattern)
+def _source_paths() -> list[str]:
+    return sorted(glob.glob(os.path.join(ADDRESSBOOK_DIR, "*/AddressBook-v22.abcddb")))
 
-    results: dict[str, str] = {}
 
+def _mtimes(db_paths: list[str]) -> tuple:
+    """Modification stamp of every source, including its WAL where writes land first."""
+    stamps = []
+    for path in db_paths:
+        for candidate in (path, path + "-wal"):
+            try:
+                stamps.append((candidate, os.stat(candidate).st_mtime_ns))
+            except OSError:
+                pass
+    return tuple(stamps)
+
+
+def _build_index(db_paths: list[str]) -> ContactIndex:
+    index = ContactIndex()
     for db_path in db_paths:
         try:
-            conn = sqlite3.connect(db_path)
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
             cur = conn.cursor()
             cur.execute(
                 """
@@ -83,11 +185,137 @@ def reverse_lookup(phone_numbers: list[str]) -> dict[str, str]:
                 """
             )
             for full_name, phone in cur.fetchall():
-                normalized = _normalize_phone(phone)
-                if normalized and normalized not in results:
-                    results[normalized] = full_name.strip()
+                index.add(full_name, phone)
             conn.close()
         except Exception:
             continue
+    index.finish()
+    return index
+
+
+def contact_index() -> ContactIndex:
+    """The process-wide contact index, rebuilt when any AddressBook file changes."""
+    global _index, _index_key, _checked_at
+    with _index_lock:
+        now = time.monotonic()
+        if _index is not None and now - _checked_at < RECHECK_SECONDS:
+            return _index
+        db_paths = _source_paths()
+        key = _mtimes(db_paths)
+        if _index is None or key != _index_key:
+            _index, _index_key = _build_index(db_paths), key
+        _checked_at = now
+        return _index
+
+
+_recency: dict[str, float] = {}
+_recency_key: tuple | None = None
+_recency_checked_at = 0.0
+
+
+def _last_messaged() -> dict[str, float]:
+    """Normalised handle → unix time of the latest message, from chat.db."""
+    global _recency, _recency_key, _recency_checked_at
+    with _index_lock:
+        now = time.monotonic()
+        if _recency_key is not None and now - _recency_checked_at < RECHECK_SECONDS:
+            return _recency
+        key = _mtimes([CHAT_DB_PATH])
+        if key != _recency_key:
+            _recency, _recency_key = {}, key
+            try:
+                conn = sqlite3.connect(f"file:{CHAT_DB_PATH}?mode=ro", uri=True)
+                rows = conn.execute(
+                    "SELECT h.id, MAX(m.date) FROM message m JOIN handle h ON m.handle_id = h.ROWID GROUP BY h.id"
+                ).fetchall()
+                conn.close()
+                for handle, date in rows:
+                    if handle and date:
+                        phone = _normalize_phone(handle)
+                        stamp = date / 1_000_000_000 + COCOA_EPOCH
+                        _recency[phone] = max(_recency.get(phone, 0.0), stamp)
+            except sqlite3.Error:
+                pass
+        _recency_checked_at = now
+        return _recency
+
+
+def search_contacts(query: str, limit: int = 10) -> list[dict]:
+    """Rank contacts against `query`, best first.
+
+    Every query word has to match a word of the name — exactly, as a prefix,
+    or within one or two typos — after case and diacritic folding. Scores are
+    the mean per-word match, a bonus for an exact full name, and a bonus for
+    recent iMessage conversations. Returns {"name", "phone", "score", "match",
+    "typo"} dicts, where "match" is the score without the recency bonus and
+    "typo" is set when some query word only matched within typos.
+    """
+    index = contact_index()
+    words = _name_tokens(query)
+    if not words:
+        return []
 
-    return {num: results[num] for num in phone_numbers if num in results}
+    per_word = [index.token_matches(word) for word in words]
+    candidates: set[int] = set()
+    for matches in per_word:
+        for token in matches:
+            candidates.update(index.by_token[token])
+
+    recency = _last_messaged()
+    now = time.time()
+    folded_query = " ".join(words)
+    results = []
+    for i in candidates:
+        tokens = index.tokens[i]
+        scores = [max((matches.get(t, 0.0) for t in tokens), default=0.0) for matches in per_word]
+        if not all(scores):
+            continue
+        match = sum(scores) / len(scores)
+        if " ".join(tokens) == folded_query:
+            match += FULL_NAME_BONUS
+        score = match
+        last = recency.get(index.contacts[i]["phone"])
+        if last:
+            days = max(0.0, now - last) / 86400
+            score += RECENCY_BONUS * 0.5 ** (days / RECENCY_HALF_LIFE_DAYS)
+        results.append({
+            **index.contacts[i],
+            "score": round(score, 3),
+            "match": round(match, 3),
+            "typo": min(scores) < PREFIX_SCORE,
+        })
+
+    results.sort(key=lambda r: (-r["score"], r["name"]))
+    return results[:limit]
+
+
+def resolve_contact(name: str) -> list[dict]:
+    """Search all AddressBook sources for contacts matching `name`.
+
+    Returns a list of {"name": str, "phone": str} dicts, deduplicated by
+    normalized phone number.
+    """
+    query = _fold(name)
+    index = contact_index()
+    # Whole words through the token map (the last one may be a prefix still being typed)
+    words = _name_tokens(name)
+    if words:
+        candidates = {i for token in index.with_prefix(words[-1]) for i in index.by_token[token]}
+        for word in words[:-1]:
+            candidates &= set(index.by_token.get(word, ()))
+        matches = [dict(index.contacts[i]) for i in sorted(candidates) if query in index.folded[i]]
+        if matches:
+            return matches
+    # Substring match on first, last or full name, as the old LIKE '%name%' did
+    matches = [dict(c) for c, folded in zip(index.contacts, index.folded) if query in folded]
+    if matches:
+        return matches
+    # Nothing contains the text verbatim — fall back to typo-tolerant ranking
+    return [{"name": r["name"], "phone": r["phone"]} for r in search_contacts(name)]
+
+
+def reverse_lookup(phone_numbers: list[str]) -> dict[str, str]:
+    if not phone_numbers:
+        return {}
+    by_phone = contact_index().by_phone
+    return {num: by_phone[num] for num in phone_numbers if num in by_phone}
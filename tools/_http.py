@@ -0,0 +1,139 @@
+"""Shared HTTP layer for network tools.
+
+One keep-alive httpx client for the whole process (HTTP/2 when the `h2`
+package is installed), a per-host cap on concurrent requests, one timeout
+policy, retries with jittered exponential backoff, and per-host timing
+counters printed next to the tool-cache summary.
+"""
+
+import importlib.util
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_CONNECTIONS = 32
+PER_HOST_LIMIT = 8
+
+RETRIES = 2
+BACKOFF_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods safe to resend after the server may already have acted on them
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+
+stats: dict[str, HostStats] = {}
+_stats_lock = threading.Lock()
+
+
+def client() -> httpx.Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                http2=HTTP2,
+                timeout=TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            )
+        return _client
+
+
+def _slot(host: str) -> threading.BoundedSemaphore:
+    with _client_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_slots[host]
+
+
+def _record(host: str, seconds: float, retried: bool = False, failed: bool = False) -> None:
+    with _stats_lock:
+        entry = stats.setdefault(host, HostStats())
+        entry.requests += 1
+        entry.seconds += seconds
+        entry.retries += retried
+        entry.errors += failed
+
+
+def _backoff(attempt: int, response: httpx.Response | None = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it gives seconds."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+
+def request(method: str, url: str, *, retries: int = RETRIES, **kwargs) -> httpx.Response:
+    """Send a request through the shared client, retrying transient failures.
+
+    Idempotent requests retry connection errors, timeouts and 429/5xx
+    responses up to `retries` times. Others (POST to a search or scrape API,
+    each attempt billed) retry only failures where the request never reached
+    the server — connect errors — and 429. The final response is returned
+    whatever its status; call raise_for_status() where an error should raise.
+    """
+    host = urlsplit(url).hostname or ""
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    retry_errors = httpx.TransportError if idempotent else (httpx.ConnectError, httpx.ConnectTimeout)
+    retry_statuses = RETRY_STATUSES if idempotent else {429}
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            with _slot(host):
+                response = client().request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            final = attempt >= retries or not isinstance(e, retry_errors)
+            _record(host, time.perf_counter() - start, retried=not final, failed=final)
+            if final:
+                raise
+            time.sleep(_backoff(attempt))
+        else:
+            retry = response.status_code in retry_statuses and attempt < retries
+            _record(host, time.perf_counter() - start, retried=retry, failed=response.is_error and not retry)
+            if not retry:
+                return response
+            time.sleep(_backoff(attempt, response))
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> httpx.Response:
+    return request("POST", url, **kwargs)
+
+
+def summary() -> str:
+    with _stats_lock:
+        if not stats:
+            return "HTTP: no requests"
+        total = sum(s.requests for s in stats.values())
+        hosts = ", ".join(
+            f"{host} {s.requests}× {s.seconds / s.requests * 1000:.0f} ms avg"
+            + (f" ({s.retries} retried)" if s.retries else "")
+            + (f" ({s.errors} failed)" if s.errors else "")
+            for host, s in sorted(stats.items(), key=lambda kv: -kv[1].requests)
+        )
+    return f"HTTP{'/2' if HTTP2 else ''}: {total} requests — {hosts}"
@@ -0,0 +1,129 @@
+"""Thread-grouped email digest — one compact entry per conversation.
+
+Messages are grouped by Gmail's X-GM-THRID when the server reports it, and
+otherwise by the root of their References / In-Reply-To chain. Each thread
+shows only its latest message, with quoted replies and signatures cut, so a
+five-message reply chain costs one body instead of five overlapping ones.
+"""
+
+import re
+from email.utils import getaddresses, parsedate_to_datetime
+
+DIGEST_BODY_CHARS = 600
+
+_SUBJECT_PREFIX_RE = re.compile(r"^\s*((re|fwd?|aw|sv)\s*(\[\d+\])?\s*:\s*)+", re.I)
+_ATTRIBUTION_RE = re.compile(r"^\s*On\b.*\bwrote:\s*$", re.I)
+
+# A line starting any of these ends the new text of a reply
+_CUT_MARKERS = (
+    "-----Original Message-----",
+    "________________________________",
+    "---------- Forwarded message",
+    "Sent from my iPhone",
+    "Sent from my iPad",
+    "Get Outlook for",
+)
+
+
+def strip_quoted(text: str) -> str:
+    """Drop quoted reply text, attribution lines and trailing signatures."""
+    lines = text.splitlines()
+    kept: list[str] = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped in ("--", "-- ") or line == "-- ":
+            break  # RFC 3676 signature separator
+        if stripped.startswith(_CUT_MARKERS):
+            break
+        if _ATTRIBUTION_RE.match(line):
+            break
+        # Gmail wraps long attributions: "On Mon, ... <a@b.c>\nwrote:"
+        if stripped.startswith("On ") and i + 1 < len(lines) and lines[i + 1].strip().endswith("wrote:"):
+            break
+        # Outlook-style header block: From: ... followed closely by Sent:/Date:
+        if stripped.startswith("From:") and any(
+            l.strip().startswith(("Sent:", "Date:")) for l in lines[i + 1:i + 4]
+        ):
+            break
+        if stripped.startswith(">"):
+            continue
+        kept.append(line)
+    text = "\n".join(kept).strip()
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def _message_ids(value: str) -> list[str]:
+    return re.findall(r"<[^<>\s]+>", value or "")
+
+
+def _thread_key(summary: dict) -> str:
+    if summary.get("thread"):
+        return f"gm:{summary['thread']}"
+    refs = _message_ids(summary.get("references", ""))
+    if refs:
+        return refs[0]
+    reply_to = _message_ids(summary.get("in_reply_to", ""))
+    if reply_to:
+        return reply_to[0]
+    return summary.get("message_id") or f"subject:{_subject(summary).lower()}"
+
+
+def _subject(summary: dict) -> str:
+    return _SUBJECT_PREFIX_RE.sub("", summary.get("subject", "")).strip() or "(no subject)"
+
+
+def _sender(summary: dict) -> str:
+    addresses = getaddresses([summary.get("from", "")])
+    if not addresses:
+        return summary.get("from", "")
+    name, addr = addresses[0]
+    return name or addr
+
+
+def _timestamp(summary: dict) -> float:
+    try:
+        return parsedate_to_datetime(summary.get("date", "")).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return 0.0
+
+
+def group_threads(summaries: list[dict]) -> list[list[dict]]:
+    """Group summaries into threads, newest thread first, each thread oldest → newest."""
+    threads: dict[str, list[dict]] = {}
+    # Message-IDs seen so far, so replies that only cite a non-root message still join
+    owner: dict[str, str] = {}
+    for summary in sorted(summaries, key=_timestamp):
+        key = _thread_key(summary)
+        for ref in _message_ids(summary.get("references", "")) + _message_ids(summary.get("in_reply_to", "")):
+            if ref in owner:
+                key = owner[ref]
+                break
+        threads.setdefault(key, []).append(summary)
+        if summary.get("message_id"):
+            owner[summary["message_id"]] = key
+    return sorted(threads.values(), key=lambda t: _timestamp(t[-1]), reverse=True)
+
+
+def format_digest(summaries: list[dict | None]) -> str:
+    entries = []
+    for i, thread in enumerate(group_threads([s for s in summaries if s]), 1):
+        latest = thread[-1]
+        senders = list(dict.fromkeys(_sender(s) for s in thread))
+        attachments = list(dict.fromkeys(a for s in thread for a in s.get("attachments", [])))
+
+        body = strip_quoted(latest["body"])
+        if len(body) > DIGEST_BODY_CHARS:
+            body = body[:DIGEST_BODY_CHARS].rstrip() + " …"
+
+        count = f" ({len(thread)} messages)" if len(thread) > 1 else ""
+        entry = (
+            f"--- Thread {i}{count} ---\n"
+            f"Subject: {_subject(thread[0])}\n"
+            f"From:    {', '.join(senders)}\n"
+            f"Latest:  {latest.get('date', '')}\n"
+        )
+        if attachments:
+            entry += f"Attachments: {', '.join(attachments)}\n"
+        entry += f"\n{body or '(no new text)'}\n"
+        entries.append(entry)
+    return "\n".join(entries)
@@ -0,0 +1,309 @@
+"""Local SQLite index of recent mail, synced incrementally from IMAP.
+
+Each (account, folder) remembers the UIDVALIDITY, UIDNEXT, message count and
+(on CONDSTORE servers) HIGHESTMODSEQ it last saw. On a CONDSTORE server a sync
+costs one STATUS round trip when nothing changed; otherwise only new UIDs are
+fetched, expunged UIDs are dropped, and flags are refreshed with CHANGEDSINCE.
+Servers without CONDSTORE get an UNSEEN search on every sync instead. Common
+read_email filters are then answered from the index, with an FTS5 table over
+sender, subject and body when available.
+"""
+
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable
+
+INDEX_PATH = Path.home() / ".cache" / "jarvis" / "mail.db"
+
+# A folder synced more recently than this is served without touching the server
+SYNC_INTERVAL_SECONDS = 60
+
+# First sync of a folder indexes only its newest messages
+INDEX_BACKFILL = 200
+
+_STATUS_RE = re.compile(rb"(UIDVALIDITY|UIDNEXT|MESSAGES|HIGHESTMODSEQ) (\d+)")
+_FLAGS_RE = re.compile(rb"UID (\d+).*?FLAGS \(([^)]*)\)|FLAGS \(([^)]*)\).*?UID (\d+)")
+
+# read_email search filters the index can answer
+_TOKEN_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+_NULLARY = {"ALL", "SEEN", "UNSEEN"}
+_UNARY = {"FROM", "SUBJECT", "TEXT"}
+
+
+def parse_filter(search: str) -> list[tuple[str, str | None]] | None:
+    """Split an IMAP search string into (KEY, arg) terms, or None if unsupported."""
+    tokens = [(quoted, bare) for quoted, bare in _TOKEN_RE.findall(search)]
+    terms: list[tuple[str, str | None]] = []
+    i = 0
+    while i < len(tokens):
+        key = tokens[i][1].upper()
+        if key in _NULLARY:
+            terms.append((key, None))
+            i += 1
+        elif key in _UNARY and i + 1 < len(tokens):
+            arg = tokens[i + 1][0] or tokens[i + 1][1]
+            terms.append((key, re.sub(r"\\(.)", r"\1", arg)))
+            i += 2
+        else:
+            return None
+    return terms
+
+
+def _fts_query(text: str) -> str:
+    """Prefix-match every word, roughly matching IMAP's substring semantics."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class MailIndex:
+    """SQLite index of decoded message summaries keyed by (account, folder, uid)."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS folders (
+                account       TEXT NOT NULL,
+                folder        TEXT NOT NULL,
+                uidvalidity   INTEGER NOT NULL,
+                uidnext       INTEGER NOT NULL,
+                messages      INTEGER NOT NULL,
+                highestmodseq INTEGER,
+                complete      INTEGER NOT NULL,
+                synced_at     REAL NOT NULL,
+                PRIMARY KEY (account, folder)
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id          INTEGER PRIMARY KEY,
+                account     TEXT NOT NULL,
+                folder      TEXT NOT NULL,
+                uid         INTEGER NOT NULL,
+                seen        INTEGER NOT NULL DEFAULT 1,
+                summary     TEXT NOT NULL,
+                from_addr   TEXT NOT NULL,
+                subject     TEXT NOT NULL,
+                body        TEXT NOT NULL,
+                UNIQUE (account, folder, uid)
+            );
+            """
+        )
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                "from_addr, subject, body, content='messages', content_rowid='id')"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 — fall back to LIKE scans
+            self.fts = False
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- sync ---------------------------------------------------------------
+
+    def sync(self, connect: Callable[[], object], account: str, folder: str,
+             fetch: Callable[[object, list[bytes]], dict[bytes, dict]], force: bool = False) -> None:
+        """Bring the index for `folder` up to date.
+
+        `connect()` returns the IMAP connection and is only called if the
+        folder is due a sync; `fetch(conn, uids)` returns uid → summary.
+        """
+        state = self._folder(account, folder)
+        if state and not force and time.time() - state["synced_at"] < SYNC_INTERVAL_SECONDS:
+            return
+
+        imap = connect()
+        condstore = "CONDSTORE" in getattr(imap, "capabilities", ())
+        items = "(UIDVALIDITY UIDNEXT MESSAGES HIGHESTMODSEQ)" if condstore else "(UIDVALIDITY UIDNEXT MESSAGES)"
+        status, data = imap.status(f'"{folder}"', items)
+        if status != "OK":
+            raise RuntimeError(f"could not get status of folder '{folder}'")
+        current = {k.decode().lower(): int(v) for k, v in _STATUS_RE.findall(data[0])}
+
+        if state and state["uidvalidity"] != current["uidvalidity"]:
+            # UIDs were renumbered — nothing we hold is addressable any more
+            self._drop_folder(account, folder)
+            state = None
+
+        unchanged = state is not None and all(
+            state[k] == current.get(k) for k in ("uidnext", "messages", "highestmodseq") if k in current
+        )
+        # Without CONDSTORE nothing in STATUS reveals flag changes (a message read
+        # on another device), so the UNSEEN search runs on every sync
+        refresh_flags = not unchanged or not condstore
+        if refresh_flags:
+            status, _ = imap.select(f'"{folder}"', readonly=True)
+            if status != "OK":
+                raise RuntimeError(f"could not open folder '{folder}'")
+        complete = state["complete"] if unchanged else self._sync_uids(imap, account, folder, state, fetch)
+        if refresh_flags:
+            self._sync_flags(imap, account, folder, state, condstore)
+
+        self.conn.execute(
+            """
+            INSERT INTO folders (account, folder, uidvalidity, uidnext, messages, highestmodseq, complete, synced_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (account, folder) DO UPDATE SET
+                uidvalidity = excluded.uidvalidity, uidnext = excluded.uidnext, messages = excluded.messages,
+                highestmodseq = excluded.highestmodseq, complete = excluded.complete, synced_at = excluded.synced_at
+            """,
+            (account, folder, current["uidvalidity"], current["uidnext"], current["messages"],
+             current.get("highestmodseq"), int(complete), time.time()),
+        )
+        self.conn.commit()
+
+    def _sync_uids(self, imap, account: str, folder: str, state: dict | None, fetch) -> bool:
+        """Fetch new UIDs and drop expunged ones. Returns whether the whole folder is indexed."""
+        local = self._uids(account, folder)
+        if state is None or not local:
+            status, data = imap.uid("SEARCH", "ALL")
+            present = [int(u) for u in data[0].split()] if status == "OK" else []
+            complete = len(present) <= INDEX_BACKFILL
+            present = present[-INDEX_BACKFILL:]
+        else:
+            status, data = imap.uid("SEARCH", f"UID {min(local)}:*")
+            present = [int(u) for u in data[0].split()] if status == "OK" else sorted(local)
+            complete = bool(state["complete"])
+
+        gone = local - set(present)
+        if gone:
+            self._delete(account, folder, gone)
+
+        new = [str(u).encode() for u in present if u not in local]
+        if new:
+            summaries = fetch(imap, new)
+            for uid, summary in summaries.items():
+                self._insert(account, folder, int(uid), summary)
+        return complete
+
+    def _sync_flags(self, imap, account: str, folder: str, state: dict | None, condstore: bool) -> None:
+        local = self._uids(account, folder)
+        if not local:
+            return
+        if condstore and state and state.get("highestmodseq"):
+            status, data = imap.uid(
+                "FETCH", f"{min(local)}:*", f"(FLAGS) (CHANGEDSINCE {state['highestmodseq']})"
+            )
+            if status == "OK":
+                for item in data:
+                    line = item[0] if isinstance(item, tuple) else item
+                    match = _FLAGS_RE.search(line or b"")
+                    if match:
+                        uid = int(match.group(1) or match.group(4))
+                        flags = match.group(2) if match.group(2) is not None else match.group(3)
+                        self._set_seen(account, folder, [uid], b"\\Seen" in flags)
+                return
+        # No CONDSTORE (or first sync) — one UNSEEN search over the indexed range
+        status, data = imap.uid("SEARCH", f"UID {min(local)}:* UNSEEN")
+        if status == "OK":
+            unseen = {int(u) for u in data[0].split()}
+            self._set_seen(account, folder, local - unseen, True)
+            self._set_seen(account, folder, unseen & local, False)
+
+    # -- queries ------------------------------------------------------------
+
+    def query(self, account: str, folder: str, terms: list[tuple[str, str | None]], count: int) -> list[dict] | None:
+        """Newest-first summaries matching `terms`, or None if the index can't answer.
+
+        A folder that is only partly indexed can't prove the absence of older
+        matches, so a short result from one returns None.
+        """
+        state = self._folder(account, folder)
+        if state is None:
+            return None
+
+        where = ["m.account = ?", "m.folder = ?"]
+        params: list = [account, folder]
+        match_terms = []
+        for key, arg in terms:
+            if key == "UNSEEN":
+                where.append("m.seen = 0")
+            elif key == "SEEN":
+                where.append("m.seen = 1")
+            elif key == "FROM":
+                where.append("m.from_addr LIKE ?")
+                params.append(f"%{arg}%")
+            elif key in ("SUBJECT", "TEXT"):
+                column = "subject" if key == "SUBJECT" else None
+                if self.fts and _fts_query(arg):
+                    match_terms.append(f"{column} : ({_fts_query(arg)})" if column else f"({_fts_query(arg)})")
+                else:
+                    like = "m.subject LIKE ?" if column else "(m.subject LIKE ? OR m.body LIKE ? OR m.from_addr LIKE ?)"
+                    where.append(like)
+                    params.extend([f"%{arg}%"] * like.count("?"))
+
+        sql = "SELECT m.summary FROM messages m"
+        if match_terms:
+            sql += " JOIN messages_fts f ON f.rowid = m.id"
+            where.append("messages_fts MATCH ?")
+            params.append(" AND ".join(match_terms))
+        sql += f" WHERE {' AND '.join(where)} ORDER BY m.uid DESC LIMIT ?"
+        params.append(count)
+
+        rows = self.conn.execute(sql, params).fetchall()
+        if len(rows) < count and not state["complete"]:
+            return None
+        return [json.loads(row[0]) for row in rows]
+
+    # -- storage ------------------------------------------------------------
+
+    def _folder(self, account: str, folder: str) -> dict | None:
+        row = self.conn.execute(
+            "SELECT uidvalidity, uidnext, messages, highestmodseq, complete, synced_at FROM folders "
+            "WHERE account = ? AND folder = ?",
+            (account, folder),
+        ).fetchone()
+        if not row:
+            return None
+        keys = ("uidvalidity", "uidnext", "messages", "highestmodseq", "complete", "synced_at")
+        return dict(zip(keys, row))
+
+    def _uids(self, account: str, folder: str) -> set[int]:
+        rows = self.conn.execute("SELECT uid FROM messages WHERE account = ? AND folder = ?", (account, folder))
+        return {row[0] for row in rows}
+
+    def _insert(self, account: str, folder: str, uid: int, summary: dict) -> None:
+        cur = self.conn.execute(
+            """
+            INSERT OR REPLACE INTO messages (account, folder, uid, summary, from_addr, subject, body)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (account, folder, uid, json.dumps(summary), summary["from"], summary["subject"], summary["body"]),
+        )
+        if self.fts:
+            self.conn.execute(
+                "INSERT INTO messages_fts (rowid, from_addr, subject, body) VALUES (?, ?, ?, ?)",
+                (cur.lastrowid, summary["from"], summary["subject"], summary["body"]),
+            )
+
+    def _delete(self, account: str, folder: str, uids) -> None:
+        for uid in uids:
+            row = self.conn.execute(
+                "SELECT id, from_addr, subject, body FROM messages WHERE account = ? AND folder = ? AND uid = ?",
+                (account, folder, uid),
+            ).fetchone()
+            if row is None:
+                continue
+            if self.fts:
+                self.conn.execute(
+                    "INSERT INTO messages_fts (messages_fts, rowid, from_addr, subject, body) "
+                    "VALUES ('delete', ?, ?, ?, ?)",
+                    row,
+                )
+            self.conn.execute("DELETE FROM messages WHERE id = ?", (row[0],))
+
+    def _drop_folder(self, account: str, folder: str) -> None:
+        self._delete(account, folder, self._uids(account, folder))
+        self.conn.execute("DELETE FROM folders WHERE account = ? AND folder = ?", (account, folder))
+
+    def _set_seen(self, account: str, folder: str, uids, seen: bool) -> None:
+        self.conn.executemany(
+            "UPDATE messages SET seen = ? WHERE account = ? AND folder = ? AND uid = ?",
+            [(int(seen), account, folder, uid) for uid in uids],
+        )
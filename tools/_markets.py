@@ -0,0 +1,279 @@
+"""Local price history for Polymarket markets.
+
+Every polymarket_* tool result is parsed for (market, price, volume) and
+appended to a SQLite table clustered by (market, ts), so moves since any
+point — yesterday's briefing, the last 24 h — plus mean-reversion and
+momentum inputs are computed locally with NumPy instead of refetching. The
+CLI's JSON layout isn't fixed across commands, so parsing walks the payload
+and accepts any object that names a market and carries a price.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+STORE_PATH = Path.home() / ".cache" / "jarvis" / "markets.db"
+
+# A market seen again within this many seconds isn't recorded twice
+RECORD_GAP_SECONDS = 60
+RETENTION_DAYS = 90
+# Window of history behind the z-scores and trend slopes in movers()
+HISTORY_DAYS = 14
+
+# A market's condition id is its canonical key; commands that only give a slug,
+# numeric id or title are mapped onto it through the aliases table
+_CONDITION_KEYS = ("condition_id", "conditionId")
+_ID_KEYS = ("market_id", "marketId", "slug", "id")
+_TITLE_KEYS = ("question", "title", "market", "name")
+_PRICE_KEYS = (
+    "yes_price", "yesPrice", "price", "current_price", "currentPrice",
+    "last_price", "lastTradePrice", "probability", "outcome_prices", "outcomePrices",
+)
+_VOLUME_KEYS = ("volume_24hr", "volume24hr", "volume_24h", "volume24h", "volume")
+
+
+def _number(value) -> float | None:
+    """A float from 0.63, "0.63", "63%", "$1,234" or an outcome-price list (first = Yes)."""
+    if isinstance(value, str) and value.lstrip().startswith("["):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    if isinstance(value, list):
+        return _number(value[0]) if value else None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.fullmatch(r"\s*\$?(-?[\d,]*\.?\d+)\s*(%|¢)?\s*", value)
+        if match:
+            number = float(match.group(1).replace(",", ""))
+            return number / 100 if match.group(2) else number
+    return None
+
+
+def _price(value) -> float | None:
+    price = _number(value)
+    if price is not None and 1 < price <= 100:
+        price /= 100  # reported as a percentage
+    return price if price is not None and 0 <= price <= 1 else None
+
+
+def _first(entry: dict, keys: tuple[str, ...], convert):
+    for key in keys:
+        if key in entry:
+            value = convert(entry[key])
+            if value is not None:
+                return value
+    return None
+
+
+def _ident(value) -> str | None:
+    return str(value) if isinstance(value, (str, int)) and not isinstance(value, bool) and str(value) else None
+
+
+def parse_markets(payload: str) -> list[dict]:
+    """Every {"market", "aliases", "condition_id", "title", "price", "volume"} the CLI output mentions.
+
+    "market" is the condition id when there is one, else the first other id,
+    else the folded title; "aliases" holds the remaining ids and title key.
+    """
+    try:
+        data = json.loads(payload)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+    found: list[dict] = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        title = _first(node, _TITLE_KEYS, lambda v: v.strip() if isinstance(v, str) and v.strip() else None)
+        condition = _first(node, _CONDITION_KEYS, _ident)
+        ids = [_ident(node[key]) for key in _ID_KEYS if key in node]
+        keys = [condition, *ids, f"title:{title.casefold()}" if title else None]
+        keys = list(dict.fromkeys(k for k in keys if k))
+        price = _first(node, _PRICE_KEYS, _price)
+        if keys and price is not None:
+            found.append({
+                "market": keys[0],
+                "aliases": keys[1:],
+                "condition_id": condition,
+                "title": title or keys[0],
+                "price": price,
+                "volume": _first(node, _VOLUME_KEYS, _number),
+            })
+        else:
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+    return found
+
+
+class MarketStore:
+    """SQLite price history, one row per (market, observation time)."""
+
+    def __init__(self, path: Path = STORE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS markets (
+                market  TEXT PRIMARY KEY,
+                title   TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS prices (
+                market TEXT NOT NULL,
+                ts     REAL NOT NULL,
+                price  REAL NOT NULL,
+                volume REAL,
+                PRIMARY KEY (market, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias  TEXT PRIMARY KEY,
+                market TEXT NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self.conn.execute("DELETE FROM prices WHERE ts < ?", (time.time() - RETENTION_DAYS * 86400,))
+        self.conn.commit()
+
+    def record(self, payload: str, now: float | None = None) -> int:
+        """Store the prices in one CLI result. Returns how many observations were added."""
+        parsed = parse_markets(payload)
+        if not parsed:
+            return 0
+        now = time.time() if now is None else now
+        with self.lock:
+            markets = {}
+            for m in parsed:
+                if m["condition_id"]:
+                    self._link(m["aliases"], m["market"])
+                    key = m["market"]
+                else:
+                    key = self._canonical([m["market"], *m["aliases"]]) or m["market"]
+                markets[key] = {**m, "market": key}  # last mention wins
+            self.conn.executemany(
+                "INSERT INTO markets (market, title, seen_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (market) DO UPDATE SET title = excluded.title, seen_at = excluded.seen_at",
+                [(m["market"], m["title"], now) for m in markets.values()],
+            )
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO prices (market, ts, price, volume) "
+                "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM prices WHERE market = ? AND ts > ?)",
+                [
+                    (m["market"], now, m["price"], m["volume"], m["market"], now - RECORD_GAP_SECONDS)
+                    for m in markets.values()
+                ],
+            )
+            added = self.conn.total_changes - before
+            self.conn.commit()
+        return added
+
+    def _link(self, aliases: list[str], market: str) -> None:
+        """Point `aliases` at condition id `market`, moving any history kept under them."""
+        for alias in aliases:
+            self.conn.execute(
+                "INSERT INTO aliases (alias, market) VALUES (?, ?) "
+                "ON CONFLICT (alias) DO UPDATE SET market = excluded.market",
+                (alias, market),
+            )
+            self.conn.execute("UPDATE OR IGNORE prices SET market = ? WHERE market = ?", (market, alias))
+            self.conn.execute("DELETE FROM prices WHERE market = ?", (alias,))
+            self.conn.execute("DELETE FROM markets WHERE market = ?", (alias,))
+
+    def _canonical(self, keys: list[str]) -> str | None:
+        """The condition id already linked to any of `keys`, most specific key first."""
+        for key in keys:
+            row = self.conn.execute("SELECT market FROM aliases WHERE alias = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def movers(self, since: float, limit: int = 10, now: float | None = None) -> list[dict]:
+        """Markets ranked by absolute price change since `since`, from local history only.
+
+        The baseline is the last observation at or before `since` (or the first
+        after it when the market was first seen later). z-score and slope are
+        over the HISTORY_DAYS before now, slope in price points per day.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT market, ts, price FROM prices WHERE ts >= ? AND ts <= ? ORDER BY market, ts",
+                (min(since, now - HISTORY_DAYS * 86400), now),
+            ).fetchall()
+            titles = dict(self.conn.execute("SELECT market, title FROM markets"))
+        if not rows:
+            return []
+
+        market = np.array([r[0] for r in rows], dtype=object)
+        ts = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        price = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+
+        starts = np.flatnonzero(np.r_[True, market[1:] != market[:-1]])
+        ends = np.r_[starts[1:], len(rows)] - 1
+        counts = ends - starts + 1
+
+        at_or_before = np.add.reduceat((ts <= since).astype(np.int64), starts)
+        base = np.where(at_or_before > 0, starts + at_or_before - 1, starts)
+        change = price[ends] - price[base]
+
+        mean = np.add.reduceat(price, starts) / counts
+        var = np.maximum(np.add.reduceat(price ** 2, starts) / counts - mean ** 2, 0.0)
+        std = np.sqrt(var)
+        zscore = np.divide(price[ends] - mean, std, out=np.zeros_like(std), where=std > 1e-9)
+
+        days = (ts - np.repeat(ts[starts], counts)) / 86400
+        t_mean = np.add.reduceat(days, starts) / counts
+        cov = np.add.reduceat(days * price, starts) / counts - t_mean * mean
+        t_var = np.add.reduceat(days ** 2, starts) / counts - t_mean ** 2
+        slope = np.divide(cov, t_var, out=np.zeros_like(cov), where=t_var > 1e-12)
+
+        # Only markets observed after the baseline have a move to report
+        moved = np.flatnonzero((ts[ends] > since) & (ends > base))
+        ranked = moved[np.argsort(-np.abs(change[moved]), kind="stable")][:limit]
+        return [
+            {
+                "market": titles.get(market[starts[g]], market[starts[g]]),
+                "price": round(float(price[ends[g]]), 4),
+                "baseline": round(float(price[base[g]]), 4),
+                "change": round(float(change[g]), 4),
+                "baseline_at": time.strftime("%Y-%m-%d %H:%M", time.localtime(ts[base[g]])),
+                "observations": int(counts[g]),
+                "zscore": round(float(zscore[g]), 2),
+                "slope_per_day": round(float(slope[g]), 4),
+            }
+            for g in ranked
+        ]
+
+
+_store: MarketStore | None = None
+_store_lock = threading.Lock()
+
+
+def market_store() -> MarketStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MarketStore()
+        return _store
+
+
+def record_prices(payload: str) -> None:
+    """Record a polymarket_* result; history is best-effort and never fails the tool."""
+    try:
+        market_store().record(payload)
+    except (sqlite3.Error, OSError):
+        pass
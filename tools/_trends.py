@@ -0,0 +1,162 @@
+"""Signal features for Google Trends interest-over-time series.
+
+Series from one or many trends_search calls are left-padded with NaN into a
+(queries × points) matrix and every feature is computed across all rows at
+once: trend slope over the recent window, z-score of the latest point against
+the window before it, breakout flag, recent change, and a seasonality-adjusted
+change for timeframes long enough to hold two full cycles.
+"""
+
+import warnings
+
+import numpy as np
+
+# Points per seasonal cycle for each trends_search timeframe (hourly → daily
+# cycle, daily → weekly, weekly → yearly, monthly → yearly)
+SEASON_STEPS = {"7d": 24, "1m": 7, "3m": 7, "5y": 52, "10y": 12}
+
+MIN_WINDOW = 4
+# A latest point this many standard deviations above the window, and above its max, is a breakout
+BREAKOUT_Z = 2.0
+
+_DATE_KEYS = ("date", "time", "timestamp", "formattedTime")
+_VALUE_KEYS = ("value", "interest", "score")
+
+
+def _point(entry, query: str) -> float | None:
+    """The interest value in one series entry, whatever shape the CLI gave it."""
+    if isinstance(entry, bool):
+        return None
+    if isinstance(entry, (int, float)):
+        return float(entry)
+    if isinstance(entry, (list, tuple)) and entry:
+        return _point(entry[-1], query)
+    if isinstance(entry, dict):
+        if entry.get("isPartial") or entry.get("is_partial"):
+            return None  # Google's last bucket is still filling
+        for key in (query, *_VALUE_KEYS):
+            if key in entry:
+                return _point(entry[key], query)
+        numbers = [v for k, v in entry.items() if k not in _DATE_KEYS and isinstance(v, (int, float)) and not isinstance(v, bool)]
+        return float(numbers[0]) if len(numbers) == 1 else None
+    return None
+
+
+def parse_series(series, query: str = "") -> np.ndarray:
+    """Interest values, oldest first, from a list of points or a {date: value} map."""
+    if isinstance(series, dict):
+        items = sorted(series.items())
+        entries = [value for _, value in items]
+    elif isinstance(series, list):
+        entries = series
+    else:
+        return np.empty(0)
+    values = [_point(entry, query) for entry in entries]
+    return np.array([v for v in values if v is not None], dtype=np.float64)
+
+
+def stack(rows: list[np.ndarray]) -> np.ndarray:
+    """Right-align series of different lengths into one NaN-padded matrix."""
+    width = max((len(r) for r in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        if len(row):
+            matrix[i, width - len(row):] = row
+    return matrix
+
+
+def _masked_slope(window: np.ndarray) -> np.ndarray:
+    """Least-squares slope per row in points per step, ignoring NaNs."""
+    mask = ~np.isnan(window)
+    x = np.broadcast_to(np.arange(window.shape[1], dtype=np.float64), window.shape)
+    n = mask.sum(axis=1)
+    x_mean = np.where(mask, x, 0).sum(axis=1) / n
+    y_mean = np.where(mask, window, 0).sum(axis=1) / n
+    dx = np.where(mask, x - x_mean[:, None], 0)
+    dy = np.where(mask, window - y_mean[:, None], 0)
+    var = (dx ** 2).sum(axis=1)
+    return np.divide((dx * dy).sum(axis=1), var, out=np.full(len(window), np.nan), where=var > 0)
+
+
+def signal_features(matrix: np.ndarray, timeframe: str = "") -> dict[str, np.ndarray]:
+    """Per-row features of a NaN-padded (queries × points) matrix."""
+    rows, width = matrix.shape
+    nan = np.full(rows, np.nan)
+    if width < MIN_WINDOW + 1:
+        return {"latest": matrix[:, -1] if width else nan, "mean": nan, "slope": nan,
+                "zscore": nan, "change": nan, "seasonal_change": nan, "breakout": np.zeros(rows, bool)}
+
+    window = max(MIN_WINDOW, width // 4)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows stay NaN
+        latest = matrix[:, -1]
+        before = matrix[:, -window - 1:-1]
+        base_mean = np.nanmean(before, axis=1)
+        base_std = np.nanstd(before, axis=1)
+        zscore = np.divide(latest - base_mean, base_std, out=np.zeros(rows), where=base_std > 0)
+        zscore[np.isnan(latest) | np.isnan(base_mean)] = np.nan
+        breakout = (zscore >= BREAKOUT_Z) & (latest > np.nanmax(before, axis=1))
+
+        recent = matrix[:, -window:]
+        change = np.nanmean(recent, axis=1) - np.nanmean(matrix[:, -2 * window:-window], axis=1)
+
+        seasonal_change = nan
+        period = SEASON_STEPS.get(timeframe)
+        if period and width >= 2 * period:
+            # Phase of each column counted back from the latest point, so rows line up
+            phase = (np.arange(width) - (width - 1)) % period
+            profile = np.stack([np.nanmean(matrix[:, phase == p], axis=1) for p in range(period)], axis=1)
+            adjusted = matrix - profile[:, phase] + np.nanmean(matrix, axis=1)[:, None]
+            seasonal_change = (
+                np.nanmean(adjusted[:, -period:], axis=1) - np.nanmean(adjusted[:, -2 * period:-period], axis=1)
+            )
+
+        return {
+            "latest": latest,
+            "mean": np.nanmean(matrix, axis=1),
+            "slope": _masked_slope(recent),
+            "zscore": zscore,
+            "change": change,
+            "seasonal_change": seasonal_change,
+            "breakout": breakout,
+        }
+
+
+def _round(value: float, digits: int = 2) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def signals_for(features: dict[str, np.ndarray], i: int) -> dict:
+    """One row of signal_features as plain JSON-friendly values."""
+    return {
+        "slope_per_sample": _round(features["slope"][i]),
+        "zscore": _round(features["zscore"][i]),
+        "breakout": bool(features["breakout"][i]),
+        "recent_change": _round(features["change"][i], 1),
+        "seasonal_change": _round(features["seasonal_change"][i], 1),
+    }
+
+
+def format_table(queries: list[str], features: dict[str, np.ndarray], errors: dict[str, str]) -> str:
+    """One line per query, strongest z-score first; failed queries in a trailing Errors section."""
+    def cell(value: float, fmt: str) -> str:
+        return "—".rjust(len(format(0.0, fmt))) if np.isnan(value) else format(value, fmt)
+
+    order = sorted(range(len(queries)), key=lambda i: -np.nan_to_num(features["zscore"][i], nan=-np.inf))
+    width = max([len(q) for q in queries] + [5])
+    lines = [
+        f"{'query':<{width}}  {'now':>4} {'avg':>5} {'slope':>6} {'z':>6} {'Δrecent':>8} {'Δseasonal':>9}",
+    ]
+    for i in order:
+        lines.append(
+            f"{queries[i]:<{width}}  {cell(features['latest'][i], '4.0f')} {cell(features['mean'][i], '5.1f')}"
+            f" {cell(features['slope'][i], '+6.2f')} {cell(features['zscore'][i], '+6.2f')}"
+            f" {cell(features['change'][i], '+8.1f')} {cell(features['seasonal_change'][i], '+9.1f')}"
+            + ("  BREAKOUT" if features["breakout"][i] else "")
+        )
+    lines.append("(slope: points per sample; z: latest vs. preceding window; Δ: recent window vs. the one before)")
+    table = "\n".join(lines)
+    if errors:
+        # Keeps a partial result out of the tool cache (see tools/_cache.py)
+        table += "\n\nErrors: " + "; ".join(f"{query}: {error}" for query, error in errors.items())
+    return table
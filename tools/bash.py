@@ -15,6 +15,8 @@ schema = {
     }
 }
 
+cache_ttl = 0  # arbitrary side effects — never cached
+
 
 def execute(command: str) -> str:
     result = subprocess.run(
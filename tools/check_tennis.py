@@ -5,7 +5,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from datetime import date, timedelta
-from tennis import COURTS, fetch_schedule, parse_slots, fmt_time
+from tennis import COURTS, ScheduleStore, court_name, load_grid, new_slots, parse_slots, fmt_time
 
 schema = {
     "name": "check_tennis",
@@ -18,13 +18,21 @@ schema = {
                 "description": "Number of days to check (default 1 = today only)",
                 "default": 1,
             },
+            "changes_only": {
+                "type": "boolean",
+                "description": "Only report slots that opened since the previous changes_only check of this tool (default false). The first check only records a baseline.",
+                "default": False,
+            },
         },
         "required": [],
     },
 }
 
+cache_ttl = 0  # tennis.ScheduleStore already dedupes fetches, and changes_only is stateful
+parallel_safe = True
+
 
-def execute(days: int = 1) -> str:
+def execute(days: int = 1, changes_only: bool = False) -> str:
     today = date.today()
     dates = [today + timedelta(days=i) for i in range(days)]
 
@@ -33,12 +41,18 @@ def execute(days: int = 1) -> str:
         ("After 7 PM", 19, 24),
     ]
 
+    with ScheduleStore() as store:
+        schedules, errors = load_grid(store, [info["id"] for info in COURTS.values()], dates)
+        opened, compared = new_slots(store, schedules, "check_tennis") if changes_only else (None, True)
+
     lines = []
     for name, info in COURTS.items():
         court_lines = []
         for day in dates:
-            data = fetch_schedule(info["id"], day)
-            slots = parse_slots(data, day)
+            if opened is not None:
+                slots = opened.get((info["id"], day), [])
+            else:
+                slots = parse_slots(schedules.get((info["id"], day), {}), day)
 
             for label, after, before in windows:
                 matched = [s for s in slots if after <= s["start_hour"] < before]
@@ -55,7 +69,22 @@ def execute(days: int = 1) -> str:
             lines.append(f"{name}:")
             lines.extend(court_lines)
 
+    error_lines = [
+        f"  {court_name(loc)} {day.strftime('%a %b %-d')}: {error}"
+        for (loc, day), error in errors.items()
+    ]
+    footer = ("\n\nCould not fetch:\n" + "\n".join(error_lines)) if error_lines else ""
+
+    if not compared:
+        return (
+            "No previous changes_only check to compare against — recorded current availability as the "
+            "baseline; the next changes_only call will report newly opened slots." + footer
+        )
+
     if not lines:
-        return "No tennis courts available in the 6-8 AM or after 7 PM windows."
+        if changes_only:
+            return "No newly opened courts in the 6-8 AM or after 7 PM windows since the last check." + footer
+        return "No tennis courts available in the 6-8 AM or after 7 PM windows." + footer
 
-    return "TENNIS COURTS AVAILABLE\n" + "\n".join(lines)
+    heading = "NEWLY OPENED TENNIS COURTS" if changes_only else "TENNIS COURTS AVAILABLE"
+    return heading + "\n" + "\n".join(lines) + footer
@@ -1,29 +1,20 @@
-import json
-import urllib.request
-import urllib.parse
+import math
+import sys
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 
-# Hardcoded locations for the briefing
-LOCATIONS = {
-    "cupertino": {
-        "name": "Apple Park, Cupertino",
-        "latitude": 37.3348,
-        "longitude": -122.0090,
-        "timezone": "America/Los_Angeles",
-    },
-    "home": {
-        "name": "Nob Hill, San Francisco",
-        "latitude": 37.7946,
-        "longitude": -122.4205,
-        "timezone": "America/Los_Angeles",
-    },
-    "tahoe": {
-        "name": "Lake Tahoe",
-        "latitude": 39.1906,
-        "longitude": -120.2484,
-        "timezone": "America/Los_Angeles",
-    },
-}
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import LocationConfig, load_config
+from tools import _http
+
+# Locations come from [weather.locations.*] in config.toml, loaded once at import
+LOCATIONS: dict[str, LocationConfig] = load_config().weather.locations
 
 WMO_CODES = {
     0: "Clear sky",
@@ -60,9 +51,11 @@ schema = {
     "name": "get_weather",
     "description": (
         "Get current weather conditions and 7-day forecasts for key locations using Open-Meteo. "
-        "Locations: 'home' (Nob Hill, SF), 'cupertino' (Apple Park), 'tahoe' (Lake Tahoe), or 'all'. "
-        "Returns current temp, feels-like, humidity, wind, and daily highs/lows with conditions. "
-        "For Tahoe, includes a snow alert showing total inches and snow days in the next 7 days. "
+        "Locations: " + ", ".join(f"'{k}' ({loc.name})" for k, loc in LOCATIONS.items()) + ", or 'all'. "
+        "Returns current temp, feels-like, humidity, wind, and daily highs/lows with conditions, "
+        "plus alerts configured per location (e.g. a snow alert with total inches and snow days). "
+        "Use `query` for derived answers — warmest day, snow totals, precipitation windows — "
+        "instead of reading the full forecast. "
         "Always prefer this over web search for weather — it's faster and more precise."
     ),
     "input_schema": {
@@ -70,63 +63,265 @@ schema = {
         "properties": {
             "location": {
                 "type": "string",
-                "enum": ["home", "cupertino", "tahoe", "all"],
+                "enum": [*LOCATIONS.keys(), "all"],
                 "description": (
                     "Which location(s) to fetch. "
-                    "'home' = Nob Hill, SF. "
-                    "'cupertino' = Apple Park. "
-                    "'tahoe' = Lake Tahoe (includes snow alert). "
-                    "'all' = all three (default)."
+                    + " ".join(f"'{k}' = {loc.name}." for k, loc in LOCATIONS.items())
+                    + " 'all' = every location (default)."
+                ),
+            },
+            "query": {
+                "type": "string",
+                "enum": ["forecast", "warmest", "snow", "precip"],
+                "description": (
+                    "'forecast' = full conditions + 7-day forecast (default). "
+                    "'warmest' = warmest day per location. "
+                    "'snow' = 7-day snow total and snow days. "
+                    "'precip' = runs of days with a high chance of precipitation."
                 ),
-            }
+            },
         },
         "required": [],
     },
 }
 
+cache_ttl = 900
+parallel_safe = True
 
-def _fetch(lat: float, lon: float, timezone: str) -> dict:
+DAILY_VARS = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "weather_code",
+    "precipitation_sum",
+    "snowfall_sum",
+    "precipitation_probability_max",
+    "wind_speed_10m_max",
+]
+
+CURRENT_VARS = [
+    "temperature_2m",
+    "apparent_temperature",
+    "relative_humidity_2m",
+    "weather_code",
+    "wind_speed_10m",
+    "wind_gusts_10m",
+    "precipitation",
+    "snowfall",
+]
+
+# Parsed forecasts are reused for this long, so the briefing and follow-up
+# REPL questions share one fetch
+FORECAST_TTL = 600
+
+# Days at or above this precipitation probability count toward a precip window
+PRECIP_WINDOW_PROBABILITY = 50
+
+
+def _day_label(day: str) -> str:
+    return datetime.strptime(day, "%Y-%m-%d").strftime("%a %m/%d")
+
+
+def _num(value: float) -> float:
+    """Missing values are stored as NaN; treat them as zero for sums and thresholds."""
+    return 0.0 if math.isnan(value) else value
+
+
+@dataclass
+class LocationForecast:
+    """One location's forecast in columnar form: a float array per daily variable."""
+    fetched_at: float
+    current: dict
+    days: tuple[str, ...]
+    daily: dict[str, array]
+
+    @classmethod
+    def parse(cls, raw: dict, fetched_at: float) -> "LocationForecast":
+        d = raw["daily"]
+        return cls(
+            fetched_at=fetched_at,
+            current=raw["current"],
+            days=tuple(d["time"]),
+            daily={
+                var: array("d", (math.nan if v is None else v for v in d.get(var, [])))
+                for var in DAILY_VARS
+            },
+        )
+
+    def snow(self) -> tuple[float, list[str]]:
+        col = self.daily["snowfall_sum"]
+        total = sum(_num(v) for v in col)
+        return total, [_day_label(day) for day, v in zip(self.days, col) if _num(v) > 0]
+
+    def warmest(self) -> tuple[str, float]:
+        col = self.daily["temperature_2m_max"]
+        i = max(range(len(col)), key=lambda i: -math.inf if math.isnan(col[i]) else col[i])
+        return self.days[i], col[i]
+
+    def precip_windows(self, min_probability: int = PRECIP_WINDOW_PROBABILITY) -> list[tuple[str, str, float]]:
+        """Runs of consecutive days at or above `min_probability`: (first, last, total inches)."""
+        pop = self.daily["precipitation_probability_max"]
+        amount = self.daily["precipitation_sum"]
+        windows = []
+        start = None
+        for i in range(len(self.days) + 1):
+            wet = i < len(self.days) and _num(pop[i]) >= min_probability
+            if wet and start is None:
+                start = i
+            elif not wet and start is not None:
+                total = sum(_num(amount[j]) for j in range(start, i))
+                windows.append((self.days[start], self.days[i - 1], total))
+                start = None
+        return windows
+
+
+class ForecastIndex:
+    """Parsed forecasts by location key, reused until they are FORECAST_TTL old."""
+
+    def __init__(self, ttl: float = FORECAST_TTL):
+        self.ttl = ttl
+        self._by_key: dict[str, LocationForecast] = {}
+        self._lock = threading.Lock()
+
+    def fresh(self, key: str) -> LocationForecast | None:
+        with self._lock:
+            forecast = self._by_key.get(key)
+        if forecast and time.time() - forecast.fetched_at < self.ttl:
+            return forecast
+        return None
+
+    def add(self, key: str, raw: dict) -> LocationForecast:
+        forecast = LocationForecast.parse(raw, time.time())
+        with self._lock:
+            self._by_key[key] = forecast
+        return forecast
+
+
+_index = ForecastIndex()
+
+
+def _request(latitudes: list[float], longitudes: list[float], timezones: list[str]):
     params = {
-        "latitude": lat,
-        "longitude": lon,
-        "timezone": timezone,
+        "latitude": ",".join(str(lat) for lat in latitudes),
+        "longitude": ",".join(str(lon) for lon in longitudes),
+        "timezone": ",".join(timezones),
         "temperature_unit": "fahrenheit",
         "wind_speed_unit": "mph",
         "precipitation_unit": "inch",
         "forecast_days": 7,
-        "current": ",".join([
-            "temperature_2m",
-            "apparent_temperature",
-            "relative_humidity_2m",
-            "weather_code",
-            "wind_speed_10m",
-            "wind_gusts_10m",
-            "precipitation",
-            "snowfall",
-        ]),
-        "daily": ",".join([
-            "temperature_2m_max",
-            "temperature_2m_min",
-            "weather_code",
-            "precipitation_sum",
-            "snowfall_sum",
-            "precipitation_probability_max",
-            "wind_speed_10m_max",
-        ]),
+        "current": ",".join(CURRENT_VARS),
+        "daily": ",".join(DAILY_VARS),
     }
-    url = "https://api.open-meteo.com/v1/forecast?" + urllib.parse.urlencode(params)
-    with urllib.request.urlopen(url, timeout=10) as resp:
-        return json.loads(resp.read())
+    resp = _http.get("https://api.open-meteo.com/v1/forecast", params=params, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _fetch(lat: float, lon: float, timezone: str) -> dict:
+    return _request([lat], [lon], [timezone])
 
 
-def _wmo(code: int) -> str:
+def _fetch_batch(keys: list[str]) -> dict[str, dict]:
+    """One request for several locations — Open-Meteo answers with a list, in order."""
+    locs = [LOCATIONS[k] for k in keys]
+    data = _request(
+        [loc.latitude for loc in locs],
+        [loc.longitude for loc in locs],
+        [loc.timezone for loc in locs],
+    )
+    if isinstance(data, dict):
+        data = [data]
+    if len(data) != len(keys):
+        raise ValueError(f"expected {len(keys)} forecasts, got {len(data)}")
+    return dict(zip(keys, data))
+
+
+def _load(keys: list[str]) -> tuple[dict[str, LocationForecast], dict[str, str]]:
+    """Return (forecasts, errors) for `keys`, fetching only what the index lacks."""
+    forecasts: dict[str, LocationForecast] = {}
+    for key in keys:
+        forecast = _index.fresh(key)
+        if forecast is not None:
+            forecasts[key] = forecast
+    missing = [k for k in keys if k not in forecasts]
+    fetched: dict[str, dict] = {}
+    errors: dict[str, str] = {}
+
+    if len(missing) > 1:
+        try:
+            fetched = _fetch_batch(missing)
+            missing = []
+        except Exception:
+            pass  # fall back to one request per location below
+
+    def fetch_one(key: str):
+        loc = LOCATIONS[key]
+        try:
+            return key, _fetch(loc.latitude, loc.longitude, loc.timezone), None
+        except Exception as e:
+            return key, None, str(e)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            for key, data, error in pool.map(fetch_one, missing):
+                if error is None:
+                    fetched[key] = data
+                else:
+                    errors[key] = error
+
+    for key, raw in fetched.items():
+        try:
+            forecasts[key] = _index.add(key, raw)
+        except Exception as e:
+            errors[key] = f"unexpected response: {e}"
+
+    return forecasts, errors
+
+
+def _wmo(code: float) -> str:
     return WMO_CODES.get(int(code), f"Code {code}")
 
 
-def _format_location(loc_key: str, data: dict) -> str:
-    name = LOCATIONS[loc_key]["name"]
-    c = data["current"]
-    d = data["daily"]
+# ---------------------------------------------------------------------------
+# Alert rules — evaluated over the index for locations that list them in
+# their `alerts`. Each returns the lines to append, or None for nothing.
+# ---------------------------------------------------------------------------
+
+def _snow_rule(forecast: LocationForecast) -> list[str]:
+    total, days = forecast.snow()
+    if total >= 0.1:
+        return [f"SNOW ALERT: {total:.1f}\" forecast over 7 days  |  Days: {', '.join(days)}"]
+    return ["No snow in the 7-day forecast."]
+
+
+def _rain_rule(forecast: LocationForecast) -> list[str] | None:
+    windows = forecast.precip_windows()
+    if not windows:
+        return None
+    return [
+        f"RAIN ALERT: {_day_label(first)}" + (f" – {_day_label(last)}" if last != first else "") + f'  {total:.2f}"'
+        for first, last, total in windows
+    ]
+
+
+def _wind_rule(forecast: LocationForecast, threshold: float = 25) -> list[str] | None:
+    col = forecast.daily["wind_speed_10m_max"]
+    windy = [(_day_label(day), v) for day, v in zip(forecast.days, col) if _num(v) >= threshold]
+    if not windy:
+        return None
+    return ["WIND ALERT: " + ", ".join(f"{label} {v:.0f} mph" for label, v in windy)]
+
+
+RULES = {
+    "snow": _snow_rule,
+    "rain": _rain_rule,
+    "wind": _wind_rule,
+}
+
+
+def _format_location(loc_key: str, forecast: LocationForecast) -> str:
+    name = LOCATIONS[loc_key].name
+    c = forecast.current
+    d = forecast.daily
 
     lines = [f"### {name}"]
 
@@ -142,53 +337,74 @@ def _format_location(loc_key: str, data: dict) -> str:
 
     # 7-day daily forecast
     lines.append("Forecast:")
-    for i, date in enumerate(d["time"]):
+    for i, day in enumerate(forecast.days):
         hi = d["temperature_2m_max"][i]
         lo = d["temperature_2m_min"][i]
         cond = _wmo(d["weather_code"][i])
-        pop = d["precipitation_probability_max"][i] or 0
-        precip = d["precipitation_sum"][i] or 0
-        snow = d["snowfall_sum"][i] or 0
-        label = datetime.strptime(date, "%Y-%m-%d").strftime("%a %m/%d")
-        row = f"  {label}: {hi:.0f}/{lo:.0f}°F  {cond}  {pop}% precip"
+        pop = _num(d["precipitation_probability_max"][i])
+        precip = _num(d["precipitation_sum"][i])
+        snow = _num(d["snowfall_sum"][i])
+        row = f"  {_day_label(day)}: {hi:.0f}/{lo:.0f}°F  {cond}  {pop:.0f}% precip"
         if precip > 0:
             row += f'  {precip:.2f}"'
         if snow > 0:
             row += f"  {snow:.1f}\" snow"
         lines.append(row)
 
-    # Tahoe-specific snow alert
-    if loc_key == "tahoe":
-        total_snow = sum(d["snowfall_sum"][i] or 0 for i in range(len(d["time"])))
-        snow_days = [
-            datetime.strptime(d["time"][i], "%Y-%m-%d").strftime("%a %m/%d")
-            for i in range(len(d["time"]))
-            if (d["snowfall_sum"][i] or 0) > 0
-        ]
-        lines.append("")
-        if total_snow >= 0.1:
-            lines.append(
-                f"SNOW ALERT: {total_snow:.1f}\" forecast over 7 days  |  Days: {', '.join(snow_days)}"
-            )
-        else:
-            lines.append("No snow in the 7-day forecast.")
+    # Configured alerts (e.g. the Tahoe snow alert)
+    for alert in LOCATIONS[loc_key].alerts:
+        rule = RULES.get(alert)
+        extra = rule(forecast) if rule else None
+        if extra:
+            lines.append("")
+            lines.extend(extra)
 
     return "\n".join(lines)
 
 
-def execute(location: str = "all") -> str:
+def _format_query(query: str, loc_key: str, forecast: LocationForecast) -> str:
+    name = LOCATIONS[loc_key].name
+    if query == "warmest":
+        day, high = forecast.warmest()
+        return f"{name}: warmest {_day_label(day)} at {high:.0f}°F"
+    if query == "snow":
+        total, days = forecast.snow()
+        if total < 0.1:
+            return f"{name}: no snow in the 7-day forecast"
+        return f"{name}: {total:.1f}\" snow over 7 days ({', '.join(days)})"
+    if query == "precip":
+        windows = forecast.precip_windows()
+        if not windows:
+            return f"{name}: no days at {PRECIP_WINDOW_PROBABILITY}%+ chance of precipitation"
+        spans = [
+            _day_label(first) + (f" – {_day_label(last)}" if last != first else "") + f' ({total:.2f}")'
+            for first, last, total in windows
+        ]
+        return f"{name}: {'; '.join(spans)}"
+    return _format_location(loc_key, forecast)
+
+
+def execute(location: str = "all", query: str = "forecast") -> str:
     keys = list(LOCATIONS.keys()) if location == "all" else [location]
+    unknown = [k for k in keys if k not in LOCATIONS]
+    if unknown:
+        return f"Unknown location '{location}'. Known: {', '.join(LOCATIONS)}, all"
+    forecasts, errors = _load(keys)
+
     parts = []
-    errors = []
     for key in keys:
-        loc = LOCATIONS[key]
+        if key not in forecasts:
+            continue
         try:
-            data = _fetch(loc["latitude"], loc["longitude"], loc["timezone"])
-            parts.append(_format_location(key, data))
+            parts.append(_format_query(query, key, forecasts[key]))
         except Exception as e:
-            errors.append(f"{loc['name']}: {e}")
+            errors[key] = str(e)
+
+    if not parts and errors:
+        return "Error fetching weather — " + "; ".join(f"{LOCATIONS[k].name}: {e}" for k, e in errors.items())
 
-    result = "\n\n".join(parts)
+    separator = "\n\n" if query == "forecast" else "\n"
+    result = separator.join(parts)
     if errors:
-        result += "\n\nErrors: " + "; ".join(errors)
+        result += "\n\nErrors: " + "; ".join(f"{LOCATIONS[k].name}: {e}" for k, e in errors.items())
     return result or "No data."
@@ -1,4 +1,5 @@
-import subprocess
+from tools._cli import cli_output, run_cli
+from tools._markets import record_prices
 
 schema = {
     "name": "polymarket_dashboard",
@@ -14,12 +15,11 @@ schema = {
     },
 }
 
+cache_ttl = 120
+parallel_safe = True
+
 
 def execute() -> str:
-    result = subprocess.run(
-        ["polymarket", "dashboard", "--format", "json"],
-        capture_output=True,
-        text=True,
-        timeout=30,
-    )
-    return result.stdout.strip() or result.stderr.strip() or "No results."
+    result = run_cli("polymarket", ["dashboard", "--format", "json"])
+    record_prices(result.stdout)
+    return cli_output(result)
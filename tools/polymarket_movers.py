@@ -1,11 +1,17 @@
-import subprocess
+import json
+import time
+
+from tools._cli import cli_output, run_cli
+from tools._markets import market_store, record_prices
 
 schema = {
     "name": "polymarket_movers",
     "description": (
         "Get the top Polymarket prediction markets sorted by 24hr volume. Returns "
         "prices and recent changes. Use as a general pulse check on what markets "
-        "are active."
+        "are active. Pass since_hours to rank markets by their price move since then "
+        "(e.g. 24 for since yesterday's briefing) from locally recorded history — no "
+        "new fetch, and each entry includes a z-score and trend slope."
     ),
     "input_schema": {
         "type": "object",
@@ -15,17 +21,26 @@ schema = {
                 "description": "Number of markets (default 5)",
                 "default": 5,
             },
+            "since_hours": {
+                "type": "number",
+                "description": "Rank by price change over this many hours using local history instead of fetching",
+            },
         },
         "required": [],
     },
 }
 
+cache_ttl = 120
+parallel_safe = True
+
+
+def execute(limit: int = 5, since_hours: float = None) -> str:
+    if since_hours is not None:
+        movers = market_store().movers(time.time() - since_hours * 3600, limit)
+        if not movers:
+            return f"No markets with recorded prices over the last {since_hours:g} hours."
+        return json.dumps(movers)
 
-def execute(limit: int = 5) -> str:
-    result = subprocess.run(
-        ["polymarket", "markets", "--format", "json", "-n", str(limit), "--sort", "volume_24hr"],
-        capture_output=True,
-        text=True,
-        timeout=30,
-    )
-    return result.stdout.strip() or result.stderr.strip() or "No results."
+    result = run_cli("polymarket", ["markets", "--format", "json", "-n", str(limit), "--sort", "volume_24hr"])
+    record_prices(result.stdout)
+    return cli_output(result)
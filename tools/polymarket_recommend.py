@@ -1,4 +1,5 @@
-import subprocess
+from tools._cli import cli_output, run_cli
+from tools._markets import record_prices
 
 schema = {
     "name": "polymarket_recommend",
@@ -25,12 +26,11 @@ schema = {
     },
 }
 
+cache_ttl = 120
+parallel_safe = True
+
 
 def execute(strategy: str = "mean-reversion", top: int = 3) -> str:
-    result = subprocess.run(
-        ["polymarket", "recommend", "-s", strategy, "-n", str(top), "--format", "json"],
-        capture_output=True,
-        text=True,
-        timeout=30,
-    )
-    return result.stdout.strip() or result.stderr.strip() or "No recommendation available."
+    result = run_cli("polymarket", ["recommend", "-s", strategy, "-n", str(top), "--format", "json"])
+    record_prices(result.stdout)
+    return cli_output(result, "No recommendation available.")
@@ -1,4 +1,5 @@
-import subprocess
+from tools._cli import cli_output, run_cli
+from tools._markets import record_prices
 
 schema = {
     "name": "polymarket_search",
@@ -24,12 +25,11 @@ schema = {
     },
 }
 
+cache_ttl = 120
+parallel_safe = True
+
 
 def execute(query: str, limit: int = 5) -> str:
-    result = subprocess.run(
-        ["polymarket", "search", query, "--format", "json", "-n", str(limit)],
-        capture_output=True,
-        text=True,
-        timeout=30,
-    )
-    return result.stdout.strip() or result.stderr.strip() or "No results."
+    result = run_cli("polymarket", ["search", query, "--format", "json", "-n", str(limit)])
+    record_prices(result.stdout)
+    return cli_output(result)
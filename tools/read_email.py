@@ -1,11 +1,36 @@
+import base64
 import os
+import quopri
+import re
+import threading
+import time
 import imaplib
 import email
 import email.message
 from email.header import decode_header
+from html.parser import HTMLParser
+from itertools import takewhile
+
+from tools._maildigest import format_digest
+from tools._mailindex import MailIndex, parse_filter
 
 BODY_TRUNCATE = 2000
 
+# A session idle for longer than this is NOOP-checked before reuse
+KEEPALIVE_SECONDS = 60
+
+# Fetch BODYSTRUCTURE + headers first, then only the first PARTIAL_BYTES of the
+# text part. Attachments are listed from the structure and never downloaded.
+# Messages whose structure can't be parsed fall back to a full BODY.PEEK[].
+PARTIAL_FETCH = True
+PARTIAL_BYTES = 16_384
+
+HEADER_FIELDS = "FROM TO DATE SUBJECT MESSAGE-ID IN-REPLY-TO REFERENCES"
+
+# Answer ALL / UNSEEN / SEEN / FROM / SUBJECT / TEXT filters from the local
+# mail index (tools/_mailindex.py); anything else goes straight to the server
+MAIL_INDEX = True
+
 schema = {
     "name": "read_email",
     "description": (
@@ -28,11 +53,17 @@ schema = {
                 "type": "string",
                 "description": "Optional IMAP search filter. Examples: ALL, UNSEEN, FROM \"alice@example.com\", SUBJECT \"invoice\""
             },
+            "digest": {
+                "type": "boolean",
+                "description": "Group messages into threads and return one compact entry per thread (latest reply only, quoted text and signatures removed). Use for summaries such as the briefing (default: false)"
+            },
         },
         "required": []
     }
 }
 
+parallel_safe = True
+
 
 def _decode_header_value(value: str) -> str:
     """Decode MIME-encoded header values."""
@@ -48,6 +79,85 @@ def _decode_header_value(value: str) -> str:
     return "".join(decoded)
 
 
+# Contents of these elements are never visible text
+_HIDDEN_TAGS = {"head", "script", "style", "title", "noscript", "template", "svg"}
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "ol", "p", "pre", "section",
+    "table", "tr", "ul",
+}
+_HTML_CHUNK = 8192
+
+
+class _HTMLText(HTMLParser):
+    """Collect visible text from HTML, stopping once `limit` characters are out."""
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts: list[str] = []
+        self.length = 0
+        self.done = False
+        self._hidden = 0
+        self._at_space = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            self._hidden = 0  # an unclosed <head> ends here
+        elif tag in _HIDDEN_TAGS:
+            self._hidden += 1
+        elif tag in _BLOCK_TAGS:
+            self._break()
+        elif tag in ("td", "th"):
+            self.handle_data(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS:
+            self._hidden = max(0, self._hidden - 1)
+        elif tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data):
+        if self._hidden or self.done:
+            return
+        text = re.sub(r"\s+", " ", data)
+        if self._at_space:
+            text = text.lstrip(" ")
+        if not text:
+            return
+        self.parts.append(text)
+        self.length += len(text)
+        self._at_space = text.endswith(" ")
+        if self.length > self.limit:
+            self.done = True
+
+    def _break(self):
+        if not self.parts:
+            return
+        self.parts[-1] = self.parts[-1].rstrip(" ")
+        tail = "".join(self.parts[-2:])
+        if not tail.endswith("\n\n"):
+            self.parts.append("\n")
+            self.length += 1
+        self._at_space = True
+
+
+def _html_to_text(html: str, limit: int = BODY_TRUNCATE) -> str:
+    """Visible text of `html` with whitespace collapsed.
+
+    Parsing stops just past `limit` characters, so huge marketing emails cost
+    no more than the slice that survives truncation.
+    """
+    parser = _HTMLText(limit)
+    for start in range(0, len(html), _HTML_CHUNK):
+        parser.feed(html[start:start + _HTML_CHUNK])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return "".join(parser.parts).strip()
+
+
 def _extract_text_body(msg: email.message.Message) -> str:
     """Extract plain-text body, falling back to stripped HTML."""
     if msg.is_multipart():
@@ -71,14 +181,14 @@ def _extract_text_body(msg: email.message.Message) -> str:
         if plain:
             return plain
         if html:
-            import re
-            return re.sub(r"<[^>]+>", "", html)
+            return _html_to_text(html)
         return "(no text body)"
     else:
         payload = msg.get_payload(decode=True)
         if payload:
             charset = msg.get_content_charset() or "utf-8"
-            return payload.decode(charset, errors="replace")
+            text = payload.decode(charset, errors="replace")
+            return _html_to_text(text) if msg.get_content_type() == "text/html" else text
         return "(no text body)"
 
 
@@ -93,75 +203,373 @@ def _list_attachments(msg: email.message.Message) -> list[str]:
     return attachments
 
 
-def execute(folder: str = "INBOX", count: int = 5, search: str = "ALL") -> str:
+class _IMAPSession:
+    """One authenticated IMAP connection kept open and reused across calls.
+
+    IMAP connections aren't safe to share between threads, so callers hold
+    `lock` for the duration of their conversation with the server.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._conn: imaplib.IMAP4_SSL | None = None
+        self._key: tuple[str, int, str] | None = None
+        self._last_used = 0.0
+
+    def get(self, host: str, address: str, password: str, port: int = 993, ssl: bool = True) -> imaplib.IMAP4:
+        if self._conn is not None and self._key == (host, port, address):
+            idle = time.monotonic() - self._last_used
+            if idle < KEEPALIVE_SECONDS or self._alive():
+                self._last_used = time.monotonic()
+                return self._conn
+        self.close()
+        conn = imaplib.IMAP4_SSL(host, port) if ssl else imaplib.IMAP4(host, port)
+        conn.login(address, password)
+        # imaplib keeps the pre-login capability list; Gmail only adds CONDSTORE
+        # (and X-GM-EXT-1) once authenticated
+        status, data = conn.capability()
+        if status == "OK" and data and data[-1]:
+            conn.capabilities = tuple(data[-1].decode().upper().split())
+        self._conn, self._key, self._last_used = conn, (host, port, address), time.monotonic()
+        return conn
+
+    def _alive(self) -> bool:
+        try:
+            status, _ = self._conn.noop()
+            return status == "OK"
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.logout()
+            except Exception:
+                pass
+        self._conn, self._key = None, None
+
+
+_session = _IMAPSession()
+_index: MailIndex | None = None
+
+
+def _get_index() -> MailIndex:
+    global _index
+    if _index is None:
+        _index = MailIndex()
+    return _index
+
+_UID_RE = re.compile(rb"UID (\d+)")
+_THRID_RE = re.compile(rb"X-GM-THRID (\d+)")
+
+
+def _fetch_raw(conn: imaplib.IMAP4_SSL, uids: list[bytes]) -> dict[bytes, bytes]:
+    """Fetch full messages for every UID in one round trip. Returns uid → raw bytes."""
+    status, data = conn.uid("FETCH", b",".join(uids), "(BODY.PEEK[])")
+    if status != "OK":
+        return {}
+    raw: dict[bytes, bytes] = {}
+    for item in data:
+        if isinstance(item, tuple):
+            match = _UID_RE.search(item[0])
+            if match:
+                raw[match.group(1)] = item[1]
+    return raw
+
+
+# ---------------------------------------------------------------------------
+# BODYSTRUCTURE parsing
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|(NIL)(?=[\s()])|([^\s()"{]+))', re.I)
+
+
+def _parse_sexp(data: bytes, pos: int) -> tuple[list, int]:
+    """Parse one parenthesised IMAP expression starting at data[pos].
+
+    Strings become str, NIL becomes None, numbers stay as str atoms. Literals
+    ({n}) aren't supported — callers fall back to a full fetch if one shows up.
+    """
+    stack: list[list] = []
+    while True:
+        match = _TOKEN_RE.match(data, pos)
+        if not match:
+            raise ValueError(f"unparseable BODYSTRUCTURE at byte {pos}")
+        pos = match.end()
+        if match.group(1):
+            stack.append([])
+            continue
+        if match.group(2):
+            done = stack.pop()
+            if not stack:
+                return done, pos
+            stack[-1].append(done)
+            continue
+        if not stack:
+            raise ValueError("BODYSTRUCTURE must start with '('")
+        if match.group(3) is not None:
+            stack[-1].append(re.sub(rb"\\(.)", rb"\1", match.group(3)).decode("utf-8", errors="replace"))
+        elif match.group(4):
+            stack[-1].append(None)
+        else:
+            stack[-1].append(match.group(5).decode("ascii", errors="replace"))
+
+
+def _params(values) -> dict[str, str]:
+    if not isinstance(values, list):
+        return {}
+    return {str(values[i]).lower(): values[i + 1] for i in range(0, len(values) - 1, 2)}
+
+
+def _leaf_parts(node: list, prefix: str = ""):
+    """Yield (part_number, node) for every non-multipart body part."""
+    if node and isinstance(node[0], list):
+        # Children come first; the subtype and extension fields follow them
+        for i, child in enumerate(takewhile(lambda c: isinstance(c, list), node), 1):
+            yield from _leaf_parts(child, f"{prefix}.{i}" if prefix else str(i))
+    else:
+        yield prefix or "1", node
+
+
+def _describe_part(node: list) -> dict:
+    ctype = f"{node[0]}/{node[1]}".lower()
+    # Disposition sits after the type-specific extension fields
+    if ctype.startswith("text/"):
+        disp_index = 9
+    elif ctype == "message/rfc822":
+        disp_index = 11
+    else:
+        disp_index = 8
+    disposition = node[disp_index] if len(node) > disp_index and isinstance(node[disp_index], list) else None
+    disp_type = str(disposition[0]).lower() if disposition else ""
+    filename = _params(disposition[1]).get("filename") if disposition else None
+    params = _params(node[2])
+    return {
+        "type": ctype,
+        "charset": params.get("charset") or "utf-8",
+        "encoding": str(node[5] or "7bit").lower(),
+        "size": int(node[6]) if str(node[6]).isdigit() else 0,
+        "attachment": disp_type == "attachment",
+        "filename": filename or params.get("name"),
+    }
+
+
+def _decode_partial(data: bytes, encoding: str, charset: str) -> str:
+    """Decode a possibly cut-off transfer-encoded body prefix."""
+    if encoding == "base64":
+        compact = re.sub(rb"[^A-Za-z0-9+/=]", b"", data)
+        data = base64.b64decode(compact[: len(compact) - len(compact) % 4])
+    elif encoding == "quoted-printable":
+        data = quopri.decodestring(data)
+    try:
+        return data.decode(charset, errors="replace")
+    except LookupError:
+        return data.decode("utf-8", errors="replace")
+
+
+# ---------------------------------------------------------------------------
+# Fetching
+# ---------------------------------------------------------------------------
+
+def _fetch_structures(conn: imaplib.IMAP4_SSL, uids: list[bytes]) -> dict[bytes, tuple[list, bytes, str | None]]:
+    """One round trip for every message's BODYSTRUCTURE, key headers and Gmail thread id."""
+    gmail = "X-GM-EXT-1" in getattr(conn, "capabilities", ())
+    items = f"BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})]"
+    status, data = conn.uid("FETCH", b",".join(uids), f"(X-GM-THRID {items})" if gmail else f"({items})")
+    if status != "OK":
+        return {}
+    out: dict[bytes, tuple[list, bytes, str | None]] = {}
+    for item in data:
+        if not isinstance(item, tuple):
+            continue
+        match = _UID_RE.search(item[0])
+        start = item[0].find(b"BODYSTRUCTURE ")
+        if not match or start < 0:
+            continue
+        try:
+            structure, _ = _parse_sexp(item[0], start + len(b"BODYSTRUCTURE "))
+        except (ValueError, IndexError):
+            continue
+        thread = _THRID_RE.search(item[0])
+        out[match.group(1)] = (structure, item[1], thread.group(1).decode() if thread else None)
+    return out
+
+
+def _fetch_parts(conn: imaplib.IMAP4_SSL, wanted: dict[bytes, str]) -> dict[bytes, bytes]:
+    """Partial-fetch one text part per message, one round trip per distinct part number."""
+    by_part: dict[str, list[bytes]] = {}
+    for uid, part in wanted.items():
+        by_part.setdefault(part, []).append(uid)
+
+    out: dict[bytes, bytes] = {}
+    for part, uids in by_part.items():
+        status, data = conn.uid("FETCH", b",".join(uids), f"(BODY.PEEK[{part}]<0.{PARTIAL_BYTES}>)")
+        if status != "OK":
+            continue
+        for item in data:
+            if isinstance(item, tuple):
+                match = _UID_RE.search(item[0])
+                if match:
+                    out[match.group(1)] = item[1]
+    return out
+
+
+def _summaries_partial(conn: imaplib.IMAP4_SSL, uids: list[bytes]) -> dict[bytes, dict]:
+    structures = _fetch_structures(conn, uids)
+
+    plans: dict[bytes, tuple[email.message.Message, dict | None, list[str], str | None]] = {}
+    wanted: dict[bytes, str] = {}
+    for uid, (structure, header_bytes, thread) in structures.items():
+        parts = [(num, _describe_part(node)) for num, node in _leaf_parts(structure)]
+        inline = [(num, p) for num, p in parts if not p["attachment"]]
+        text = next((x for x in inline if x[1]["type"] == "text/plain"), None) \
+            or next((x for x in inline if x[1]["type"] == "text/html"), None)
+        attachments = [_decode_header_value(p["filename"]) for _, p in parts if p["attachment"] and p["filename"]]
+        headers = email.message_from_bytes(header_bytes)
+        plans[uid] = (headers, text[1] if text else None, attachments, thread)
+        if text:
+            wanted[uid] = text[0]
+
+    bodies = _fetch_parts(conn, wanted) if wanted else {}
+
+    summaries: dict[bytes, dict] = {}
+    for uid, (headers, part, attachments, thread) in plans.items():
+        if part is None:
+            body, truncated = "(no text body)", False
+        else:
+            body = _decode_partial(bodies.get(uid, b""), part["encoding"], part["charset"])
+            if part["type"] == "text/html":
+                body = _html_to_text(body)
+            truncated = part["size"] > PARTIAL_BYTES
+        summaries[uid] = _summary(headers, body, attachments, truncated, thread)
+    return summaries
+
+
+def _summaries_full(conn: imaplib.IMAP4_SSL, uids: list[bytes]) -> dict[bytes, dict]:
+    summaries: dict[bytes, dict] = {}
+    for uid, raw in _fetch_raw(conn, uids).items():
+        msg = email.message_from_bytes(raw)
+        summaries[uid] = _summary(msg, _extract_text_body(msg), _list_attachments(msg), False)
+    return summaries
+
+
+def _summary(headers: email.message.Message, body: str, attachments: list[str], truncated: bool,
+             thread: str | None = None) -> dict:
+    return {
+        "from": _decode_header_value(headers.get("From", "")),
+        "to": _decode_header_value(headers.get("To", "")),
+        "date": headers.get("Date", ""),
+        "subject": _decode_header_value(headers.get("Subject", "(no subject)")),
+        "body": body,
+        "attachments": attachments,
+        "truncated": truncated,
+        "message_id": headers.get("Message-ID", "").strip(),
+        "in_reply_to": headers.get("In-Reply-To", ""),
+        "references": headers.get("References", ""),
+        "thread": thread,
+    }
+
+
+def _summaries(conn: imaplib.IMAP4_SSL, uids: list[bytes]) -> dict[bytes, dict]:
+    """uid → summary for every UID. BODY.PEEK everywhere so we don't mark as read."""
+    summaries = _summaries_partial(conn, uids) if PARTIAL_FETCH else {}
+    missing = [uid for uid in uids if uid not in summaries]
+    if missing:
+        summaries.update(_summaries_full(conn, missing))
+    return summaries
+
+
+def _format(summaries: list[dict | None]) -> str:
+    results = []
+    for i, summary in enumerate(summaries, 1):
+        if summary is None:
+            results.append(f"--- Email {i} ---\n(failed to fetch)\n")
+            continue
+
+        body = summary["body"]
+        if len(body) > BODY_TRUNCATE:
+            body = body[:BODY_TRUNCATE] + "\n... (truncated)"
+        elif summary["truncated"]:
+            body += "\n... (truncated)"
+
+        header = (
+            f"--- Email {i} ---\n"
+            f"From:    {summary['from']}\n"
+            f"To:      {summary['to']}\n"
+            f"Date:    {summary['date']}\n"
+            f"Subject: {summary['subject']}\n"
+        )
+        if summary["attachments"]:
+            header += f"Attachments: {', '.join(summary['attachments'])}\n"
+        header += f"\n{body.strip()}\n"
+        results.append(header)
+
+    return "\n".join(results)
+
+
+def _read(conn: imaplib.IMAP4_SSL, folder: str, count: int, search: str, render=_format) -> str:
+    status, _ = conn.select(f'"{folder}"', readonly=True)
+    if status != "OK":
+        return f"Error: could not open folder '{folder}'"
+
+    status, data = conn.uid("SEARCH", search)
+    if status != "OK":
+        return f"Error: search failed with filter '{search}'"
+
+    uids = data[0].split()
+    if not uids:
+        return f"No emails found in '{folder}' matching '{search}'."
+
+    # take the most recent N
+    uids = uids[-count:]
+    uids.reverse()  # newest first
+
+    summaries = _summaries(conn, uids)
+    return render([summaries.get(uid) for uid in uids])
+
+
+def _read_indexed(connect, account: str, folder: str, count: int, search: str, render=_format) -> str:
+    """Serve the request from the mail index, falling back to a live search."""
+    terms = parse_filter(search) if MAIL_INDEX else None
+    if terms is not None:
+        index = _get_index()
+        try:
+            index.sync(connect, account, folder, _summaries)
+            summaries = index.query(account, folder, terms, count)
+        except RuntimeError:
+            summaries = None  # e.g. unknown folder — let the live path report it
+        if summaries is not None:
+            if not summaries:
+                return f"No emails found in '{folder}' matching '{search}'."
+            return render(summaries)
+    return _read(connect(), folder, count, search, render)
+
+
+def execute(folder: str = "INBOX", count: int = 5, search: str = "ALL", digest: bool = False) -> str:
     address = os.environ.get("EMAIL_ADDRESS")
     password = os.environ.get("EMAIL_APP_PASSWORD")
     imap_host = os.environ.get("EMAIL_IMAP_HOST", "imap.gmail.com")
+    # Plain-text port/SSL overrides let a local IMAP server stand in for Gmail
+    imap_port = int(os.environ.get("EMAIL_IMAP_PORT", "993"))
+    imap_ssl = os.environ.get("EMAIL_IMAP_SSL", "1") != "0"
 
     if not address or not password:
         return "Error: EMAIL_ADDRESS and EMAIL_APP_PASSWORD must be set in .env"
 
     count = max(1, min(count, 25))
 
-    try:
-        conn = imaplib.IMAP4_SSL(imap_host)
-        conn.login(address, password)
-        status, _ = conn.select(f'"{folder}"', readonly=True)
-        if status != "OK":
-            conn.logout()
-            return f"Error: could not open folder '{folder}'"
-
-        status, data = conn.search(None, search)
-        if status != "OK":
-            conn.logout()
-            return f"Error: search failed with filter '{search}'"
-
-        msg_ids = data[0].split()
-        if not msg_ids:
-            conn.logout()
-            return f"No emails found in '{folder}' matching '{search}'."
-
-        # take the most recent N
-        msg_ids = msg_ids[-count:]
-        msg_ids.reverse()  # newest first
-
-        results = []
-        for i, mid in enumerate(msg_ids, 1):
-            # BODY.PEEK so we don't mark as read
-            status, msg_data = conn.fetch(mid, "(BODY.PEEK[])")
-            if status != "OK":
-                results.append(f"--- Email {i} ---\n(failed to fetch)\n")
-                continue
-
-            raw = msg_data[0][1]
-            msg = email.message_from_bytes(raw)
-
-            from_addr = _decode_header_value(msg.get("From", ""))
-            to_addr = _decode_header_value(msg.get("To", ""))
-            date = msg.get("Date", "")
-            subject = _decode_header_value(msg.get("Subject", "(no subject)"))
-            body = _extract_text_body(msg)
-            attachments = _list_attachments(msg)
-
-            if len(body) > BODY_TRUNCATE:
-                body = body[:BODY_TRUNCATE] + "\n... (truncated)"
-
-            header = (
-                f"--- Email {i} ---\n"
-                f"From:    {from_addr}\n"
-                f"To:      {to_addr}\n"
-                f"Date:    {date}\n"
-                f"Subject: {subject}\n"
-            )
-            if attachments:
-                header += f"Attachments: {', '.join(attachments)}\n"
-            header += f"\n{body.strip()}\n"
-            results.append(header)
-
-        conn.logout()
-        return "\n".join(results)
-
-    except imaplib.IMAP4.error as e:
-        return f"IMAP error: {e}"
-    except Exception as e:
-        return f"Error reading email: {e}"
+    with _session.lock:
+        for attempt in range(2):
+            try:
+                connect = lambda: _session.get(imap_host, address, password, imap_port, imap_ssl)
+                render = format_digest if digest else _format
+                return _read_indexed(connect, f"{address}/{imap_host}:{imap_port}", folder, count, search, render)
+            except (imaplib.IMAP4.abort, OSError) as e:
+                # Server dropped the pooled connection — reconnect once
+                _session.close()
+                if attempt == 1:
+                    return f"Error reading email: {e}"
+            except imaplib.IMAP4.error as e:
+                return f"IMAP error: {e}"
+            except Exception as e:
+                return f"Error reading email: {e}"
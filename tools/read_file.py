@@ -13,6 +13,8 @@ schema = {
     }
 }
 
+parallel_safe = True
+
 
 def execute(path: str) -> str:
     with open(path, "r") as f:
@@ -1,24 +1,44 @@
 import sqlite3
 import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
 
 from tools._contacts import resolve_contact, reverse_lookup, _normalize_phone
 
 DB_PATH = os.path.expanduser("~/Library/Messages/chat.db")
 
+# Sidecar database holding the full-text index over chat.db's message text.
+# chat.db itself is only ever attached read-only.
+INDEX_PATH = Path.home() / ".cache" / "jarvis" / "imessage.db"
+INDEX_BATCH = 5000
+
 # Apple's cocoa epoch offset: seconds between 1970-01-01 and 2001-01-01
 COCOA_EPOCH = 978307200
 
+# needs_reply looks at chats with inbound messages this recent
+NEEDS_REPLY_DAYS = 7
+PREVIEW_CHARS = 160
+
 schema = {
     "name": "read_imessage",
     "description": (
         "Read iMessages from the local Messages database. "
         "Can filter by contact name or phone number and limit results. "
         "Returns messages with timestamps, contact names, and text content. "
-        "Phone numbers are automatically resolved to contact names when possible."
+        "Phone numbers are automatically resolved to contact names when possible. "
+        "mode='needs_reply' instead returns one line per chat with unanswered inbound messages "
+        "(unanswered count, age, latest message) — use it to find what needs a reply."
     ),
     "input_schema": {
         "type": "object",
         "properties": {
+            "mode": {
+                "type": "string",
+                "enum": ["messages", "needs_reply"],
+                "description": "'messages' (default) lists messages; 'needs_reply' summarises chats awaiting a reply.",
+            },
             "contact": {
                 "type": "string",
                 "description": "Contact name to filter by (e.g. 'Noah', 'Mom'). Looked up in macOS Contacts.",
@@ -35,13 +55,207 @@ schema = {
                 "type": "string",
                 "description": "Optional text to search for in message bodies.",
             },
+            "before": {
+                "type": "integer",
+                "description": "Page cursor: only return messages older than this message id (from a previous call's 'before=' hint).",
+            },
+            "days": {
+                "type": "integer",
+                "description": f"needs_reply only: how many days back to look (default {NEEDS_REPLY_DAYS}).",
+            },
         },
         "required": [],
     },
 }
 
+parallel_safe = True
+
+
+def _decode_attributed_body(blob: bytes | None) -> str | None:
+    """Pull the plain string out of an NSAttributedString typedstream blob.
+
+    Newer macOS versions leave `text` NULL and only store this archive. The
+    string follows the NSString class name as a '+' marker, a length (one
+    byte, or 0x81/0x82 then a 2/4-byte little-endian int) and UTF-8 bytes.
+    """
+    if not blob:
+        return None
+    start = blob.find(b"NSString")
+    if start < 0:
+        return None
+    marker = blob.find(b"+", start + len(b"NSString"))
+    if marker < 0 or marker + 2 > len(blob):
+        return None
+    pos = marker + 1
+    size = blob[pos]
+    if size == 0x81:
+        length, pos = int.from_bytes(blob[pos + 1:pos + 3], "little"), pos + 3
+    elif size == 0x82:
+        length, pos = int.from_bytes(blob[pos + 1:pos + 5], "little"), pos + 5
+    else:
+        length, pos = size, pos + 1
+    text = blob[pos:pos + length].decode("utf-8", errors="replace")
+    return text or None
+
+
+def _message_text(text: str | None, attributed: bytes | None) -> str | None:
+    return text if text is not None else _decode_attributed_body(attributed)
+
+
+class _MessageStore:
+    """One connection reused across calls: the sidecar index with chat.db attached read-only."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.fts = False
+
+    def get(self) -> sqlite3.Connection:
+        if self._conn is None:
+            INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+            # uri=True so the ATTACH below honours ?mode=ro
+            conn = sqlite3.connect(f"file:{INDEX_PATH}", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # Lets SQL see the text of messages that only have an attributedBody
+            conn.create_function("message_text", 2, _message_text, deterministic=True)
+            conn.execute("ATTACH DATABASE ? AS chat", (f"file:{DB_PATH}?mode=ro",))
+            conn.execute("CREATE TABLE IF NOT EXISTS index_state (key TEXT PRIMARY KEY, value INTEGER)")
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5("
+                    "text, content='', tokenize='unicode61 remove_diacritics 2')"
+                )
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # no FTS5 in this SQLite build — LIKE fallback
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def sync(self, conn: sqlite3.Connection) -> None:
+        """Index messages added to chat.db since the last sync (by ROWID)."""
+        row = conn.execute("SELECT value FROM index_state WHERE key = 'last_rowid'").fetchone()
+        last = row[0] if row else 0
+        while True:
+            rows = conn.execute(
+                """
+                SELECT ROWID, text, attributedBody FROM chat.message
+                WHERE ROWID > ? ORDER BY ROWID LIMIT ?
+                """,
+                (last, INDEX_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            entries = []
+            for r in rows:
+                body = _message_text(r["text"], r["attributedBody"])
+                if body:
+                    entries.append((r["ROWID"], body))
+            conn.executemany("INSERT INTO message_fts (rowid, text) VALUES (?, ?)", entries)
+            last = rows[-1]["ROWID"]
+            conn.execute("INSERT OR REPLACE INTO index_state (key, value) VALUES ('last_rowid', ?)", (last,))
+            conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_store = _MessageStore()
+
+
+def _fts_phrase(search: str) -> str:
+    """Quote `search` as one FTS5 phrase with a prefix match on its last word."""
+    words = search.replace('"', " ").split()
+    return f'"{" ".join(words)}"*' if words else ""
+
+
+def _format_time(date: int | None) -> str:
+    if not date:
+        return "unknown"
+    return datetime.fromtimestamp(date / 1000000000 + COCOA_EPOCH).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# One pass over the recent window: per chat, the latest inbound and outbound
+# times, how many inbound messages arrived after the last outbound one, and
+# the newest message itself. Tapbacks/reactions (associated_message_type != 0)
+# are ignored so a "Liked ..." doesn't count as an answer.
+NEEDS_REPLY_SQL = """
+    WITH recent AS (
+        SELECT
+            cmj.chat_id,
+            m.date,
+            m.is_from_me,
+            m.text,
+            m.attributedBody,
+            MAX(CASE WHEN m.is_from_me = 1 THEN m.date END) OVER (PARTITION BY cmj.chat_id) AS last_out,
+            ROW_NUMBER() OVER (PARTITION BY cmj.chat_id ORDER BY m.date DESC) AS rn
+        FROM chat.message m
+        JOIN chat.chat_message_join cmj ON cmj.message_id = m.ROWID
+        WHERE m.date > ?
+          AND (m.text IS NOT NULL OR m.attributedBody IS NOT NULL)
+          AND COALESCE(m.associated_message_type, 0) = 0
+    )
+    SELECT
+        r.chat_id,
+        c.display_name,
+        c.chat_identifier,
+        MAX(CASE WHEN r.is_from_me = 0 THEN r.date END) AS last_in,
+        MAX(r.last_out) AS last_out,
+        SUM(r.is_from_me = 0 AND r.date > COALESCE(r.last_out, 0)) AS unanswered,
+        MAX(CASE WHEN r.rn = 1 THEN r.text END) AS last_text,
+        MAX(CASE WHEN r.rn = 1 THEN r.attributedBody END) AS last_body
+    FROM recent r
+    JOIN chat.chat c ON c.ROWID = r.chat_id
+    GROUP BY r.chat_id
+    HAVING unanswered > 0
+    ORDER BY last_in DESC
+    LIMIT ?
+"""
+
+
+def _age(date: int) -> str:
+    seconds = max(0.0, time.time() - (date / 1000000000 + COCOA_EPOCH))
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h"
+    return f"{int(seconds // 86400)}d"
+
+
+def _needs_reply(limit: int, days: int) -> str:
+    since = int((time.time() - COCOA_EPOCH - days * 86400) * 1000000000)
+    with _store.lock:
+        rows = _store.get().execute(NEEDS_REPLY_SQL, (since, limit)).fetchall()
+
+    if not rows:
+        return f"No chats awaiting a reply in the last {days} days."
+
+    identifiers = [r["chat_identifier"] for r in rows if not r["display_name"]]
+    names = reverse_lookup(identifiers)
+
+    lines = [f"NEEDS REPLY ({len(rows)} chats, last {days} days)"]
+    for r in rows:
+        who = r["display_name"] or names.get(r["chat_identifier"]) or r["chat_identifier"]
+        preview = _message_text(r["last_text"], r["last_body"]) or ""
+        if len(preview) > PREVIEW_CHARS:
+            preview = preview[:PREVIEW_CHARS] + "..."
+        replied = f", you last replied {_age(r['last_out'])} ago" if r["last_out"] else ""
+        lines.append(
+            f"- {who}: {r['unanswered']} unanswered, latest {_age(r['last_in'])} ago{replied} — {preview}"
+        )
+    return "\n".join(lines)
+
+
+def execute(contact: str = None, phone_number: str = None, limit: int = 20, search: str = None,
+            before: int = None, mode: str = "messages", days: int = NEEDS_REPLY_DAYS) -> str:
+    if mode == "needs_reply":
+        try:
+            return _needs_reply(limit, days)
+        except Exception as e:
+            return f"Error reading iMessages: {e}"
 
-def execute(contact: str = None, phone_number: str = None, limit: int = 20, search: str = None) -> str:
     try:
         # Resolve contact name to phone number(s)
         phone_filter: list[str] = []
@@ -61,37 +275,47 @@ def execute(contact: str = None, phone_number: str = None, limit: int = 20, sear
         elif phone_number:
             phone_filter = [_normalize_phone(phone_number)]
 
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-
-        query = """
-            SELECT
-                datetime(m.date / 1000000000 + ?, 'unixepoch', 'localtime') AS timestamp,
-                m.is_from_me,
-                h.id AS phone,
-                m.text
-            FROM message m
-            LEFT JOIN handle h ON m.handle_id = h.ROWID
-            WHERE m.text IS NOT NULL
-        """
-        params: list = [COCOA_EPOCH]
-
-        if phone_filter:
-            placeholders = ",".join("?" for _ in phone_filter)
-            query += f" AND h.id IN ({placeholders})"
-            params.extend(phone_filter)
-
-        if search:
-            query += " AND m.text LIKE ?"
-            params.append(f"%{search}%")
-
-        query += " ORDER BY m.date DESC LIMIT ?"
-        params.append(limit)
-
-        cur.execute(query, params)
-        rows = cur.fetchall()
-        conn.close()
+        with _store.lock:
+            conn = _store.get()
+
+            query = """
+                SELECT m.ROWID AS rowid, m.date, m.is_from_me, h.id AS phone, m.text, m.attributedBody
+                FROM chat.message m
+                LEFT JOIN chat.handle h ON m.handle_id = h.ROWID
+                WHERE (m.text IS NOT NULL OR m.attributedBody IS NOT NULL)
+            """
+            params: list = []
+
+            if phone_filter:
+                # Resolve handles first so the message scan uses chat.db's handle_id index
+                placeholders = ",".join("?" for _ in phone_filter)
+                handle_ids = [r[0] for r in conn.execute(
+                    f"SELECT ROWID FROM chat.handle WHERE id IN ({placeholders})", phone_filter
+                )]
+                if not handle_ids:
+                    return "No messages found."
+                query += f" AND m.handle_id IN ({','.join('?' for _ in handle_ids)})"
+                params.extend(handle_ids)
+
+            if search and _store.fts and _fts_phrase(search):
+                _store.sync(conn)
+                query += " AND m.ROWID IN (SELECT rowid FROM message_fts WHERE message_fts MATCH ?)"
+                params.append(_fts_phrase(search))
+            elif search:
+                query += " AND message_text(m.text, m.attributedBody) LIKE ?"
+                params.append(f"%{search}%")
+
+            if before:
+                query += " AND (m.date, m.ROWID) < (SELECT date, ROWID FROM chat.message WHERE ROWID = ?)"
+                params.append(before)
+
+            # Newest first by send date (synced and imported messages can get
+            # ROWIDs out of date order); keyset pagination on (date, ROWID)
+            # instead of OFFSET, with the cursor naming the oldest message shown
+            query += " ORDER BY m.date DESC, m.ROWID DESC LIMIT ?"
+            params.append(limit)
+
+            rows = conn.execute(query, params).fetchall()
 
         if not rows:
             return "No messages found."
@@ -102,6 +326,9 @@ def execute(contact: str = None, phone_number: str = None, limit: int = 20, sear
 
         lines = []
         for r in rows:
+            text = _message_text(r["text"], r["attributedBody"])
+            if text is None:
+                continue
             if r["is_from_me"]:
                 sender = "me"
             elif contact_label:
@@ -109,9 +336,11 @@ def execute(contact: str = None, phone_number: str = None, limit: int = 20, sear
             else:
                 phone = r["phone"] or "unknown"
                 sender = phone_to_name.get(phone, phone)
-            lines.append(f"[{r['timestamp']}] {sender}: {r['text']}")
+            lines.append(f"[{_format_time(r['date'])}] {sender}: {text}")
 
         lines.reverse()
+        if len(rows) == limit:
+            lines.insert(0, f"(older messages: before={rows[-1]['rowid']})")
         return "\n".join(lines)
 
     except Exception as e:
@@ -1,5 +1,8 @@
 import os
-from tavily import TavilyClient
+
+from tools import _http
+
+SEARCH_URL = "https://api.tavily.com/search"
 
 schema = {
     "name": "search_web",
@@ -20,19 +23,19 @@ schema = {
     },
 }
 
-_client = None
-
-
-def _get_client():
-    global _client
-    if _client is None:
-        _client = TavilyClient(api_key=os.environ.get("TAVILY_API_KEY", ""))
-    return _client
+cache_ttl = 600
+parallel_safe = True
 
 
 def execute(query: str) -> str:
     try:
-        response = _get_client().search(query, max_results=5)
+        resp = _http.post(
+            SEARCH_URL,
+            json={"query": query, "max_results": 5},
+            headers={"Authorization": f"Bearer {os.environ.get('TAVILY_API_KEY', '')}"},
+        )
+        resp.raise_for_status()
+        response = resp.json()
     except Exception as e:
         return f"Search failed: {e}"
 
@@ -1,6 +1,22 @@
+import email
+import email.policy
 import os
 import smtplib
+import threading
+import time
+import uuid
 from email.message import EmailMessage
+from pathlib import Path
+
+# A session idle for longer than this is NOOP-checked before reuse
+KEEPALIVE_SECONDS = 60
+
+SEND_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 2
+
+# Messages that couldn't be delivered wait here for the next flush_outbox();
+# ones the server then rejects permanently are renamed *.failed
+OUTBOX_DIR = Path.home() / ".cache" / "jarvis" / "outbox"
 
 schema = {
     "name": "send_email",
@@ -32,14 +48,196 @@ schema = {
     }
 }
 
+cache_ttl = 0  # sends mail — never cached
+
+
+class _DataTracking:
+    """Notes when DATA goes out — past that point the server may already have the message."""
+
+    data_sent = False
+
+    def data(self, msg):
+        self.data_sent = True
+        return super().data(msg)
+
+
+class _SMTP(_DataTracking, smtplib.SMTP):
+    pass
+
+
+class _SMTP_SSL(_DataTracking, smtplib.SMTP_SSL):
+    pass
+
+
+class DeliveryUnknown(Exception):
+    """The send failed after DATA began, so the message may have been delivered anyway."""
+
+
+class _SMTPSession:
+    """One logged-in SMTP connection kept open and reused across sends."""
 
-def execute(to: str, subject: str, body: str, cc: str = "", skip_confirm: bool = False) -> str:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._server: smtplib.SMTP | None = None
+        self._key: tuple | None = None
+        self._last_used = 0.0
+
+    def get(self, host: str, port: int, address: str, password: str, starttls: bool = True) -> _SMTP:
+        key = (host, port, address)
+        if self._server is not None and self._key == key:
+            idle = time.monotonic() - self._last_used
+            if idle < KEEPALIVE_SECONDS or self._alive():
+                self._last_used = time.monotonic()
+                return self._server
+        self.close()
+        server = _SMTP_SSL(host, port, timeout=30) if port == 465 else _SMTP(host, port, timeout=30)
+        if starttls and port != 465:
+            server.starttls()
+            server.ehlo()  # STARTTLS discards the pre-TLS EHLO features, AUTH included
+        else:
+            server.ehlo_or_helo_if_needed()
+        # A local stand-in server usually doesn't offer AUTH
+        if server.has_extn("auth"):
+            server.login(address, password)
+        self._server, self._key, self._last_used = server, key, time.monotonic()
+        return server
+
+    def _alive(self) -> bool:
+        try:
+            return self._server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+        self._server, self._key = None, None
+
+
+_session = _SMTPSession()
+
+
+def _settings() -> dict | None:
     address = os.environ.get("EMAIL_ADDRESS")
     password = os.environ.get("EMAIL_APP_PASSWORD")
-    smtp_host = os.environ.get("EMAIL_SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.environ.get("EMAIL_SMTP_PORT", "587"))
-
     if not address or not password:
+        return None
+    return {
+        "host": os.environ.get("EMAIL_SMTP_HOST", "smtp.gmail.com"),
+        "port": int(os.environ.get("EMAIL_SMTP_PORT", "587")),
+        "address": address,
+        "password": password,
+        # EMAIL_SMTP_TLS=0 for a plain-text local stand-in server
+        "starttls": os.environ.get("EMAIL_SMTP_TLS", "1") != "0",
+    }
+
+
+def _is_transient(e: Exception) -> bool:
+    """4xx replies, dropped connections and socket errors are worth retrying."""
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(e, smtplib.SMTPException):
+        return False  # refused recipients, no AUTH support, ...
+    return isinstance(e, OSError)
+
+
+def _send_one(msg: EmailMessage, settings: dict) -> Exception | None:
+    """Send over the pooled session, reconnecting and backing off on transient errors.
+
+    Nothing is retried once DATA has gone out: a dropped connection there can
+    follow a delivery the server already accepted, and a retry would send twice.
+    """
+    for attempt in range(SEND_ATTEMPTS):
+        server = None
+        try:
+            server = _session.get(
+                settings["host"], settings["port"], settings["address"], settings["password"], settings["starttls"]
+            )
+            server.data_sent = False
+            server.send_message(msg)
+            return None
+        except Exception as e:
+            _session.close()
+            if server is not None and server.data_sent:
+                if isinstance(e, smtplib.SMTPResponseException):
+                    return e  # the server answered, so it definitely refused the message
+                return DeliveryUnknown(f"{str(e) or type(e).__name__} after DATA — it may have been delivered")
+            if not _is_transient(e) or attempt == SEND_ATTEMPTS - 1:
+                return e
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def _describe(msg: EmailMessage) -> str:
+    return f"Email sent to {msg['To']}" + (f" (cc: {msg['Cc']})" if msg["Cc"] else "")
+
+
+def build_message(to: str, subject: str, body: str, cc: str = "") -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = os.environ.get("EMAIL_ADDRESS", "")
+    msg["To"] = to
+    if cc:
+        msg["Cc"] = cc
+    msg["Subject"] = subject
+    msg.set_content(body)
+    return msg
+
+
+def send_many(messages: list[EmailMessage]) -> list[str]:
+    """Send several messages over one SMTP connection. Returns one result line per message."""
+    settings = _settings()
+    if settings is None:
+        return ["Error: EMAIL_ADDRESS and EMAIL_APP_PASSWORD must be set in .env"] * len(messages)
+    results = []
+    with _session.lock:
+        for msg in messages:
+            error = _send_one(msg, settings)
+            results.append(_describe(msg) if error is None else f"Failed to send email: {error}")
+    return results
+
+
+def spool(msg: EmailMessage) -> Path:
+    """Write `msg` to the outbox for a later flush_outbox()."""
+    OUTBOX_DIR.mkdir(parents=True, exist_ok=True)
+    path = OUTBOX_DIR / f"{time.time():.0f}-{uuid.uuid4().hex[:8]}.eml"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(msg.as_bytes())
+    tmp.rename(path)
+    return path
+
+
+def flush_outbox() -> list[str]:
+    """Retry every spooled message, oldest first, over one connection."""
+    if not OUTBOX_DIR.exists():
+        return []
+    settings = _settings()
+    if settings is None:
+        return []
+    results = []
+    with _session.lock:
+        for path in sorted(OUTBOX_DIR.glob("*.eml")):
+            msg = email.message_from_bytes(path.read_bytes(), policy=email.policy.default)
+            error = _send_one(msg, settings)
+            if error is None:
+                path.unlink()
+                results.append(f"{_describe(msg)} (from outbox)")
+            elif _is_transient(error):
+                results.append(f"Still queued: {msg['Subject']} ({error})")
+                break  # server is still unhappy — keep the rest for next time
+            else:
+                path.rename(path.with_suffix(".failed"))
+                results.append(f"Failed to send email: {error} — left in {path.with_suffix('.failed')}")
+    return results
+
+
+def execute(to: str, subject: str, body: str, cc: str = "", skip_confirm: bool = False,
+            spool_on_failure: bool = False) -> str:
+    settings = _settings()
+    if settings is None and not spool_on_failure:
         return "Error: EMAIL_ADDRESS and EMAIL_APP_PASSWORD must be set in .env"
 
     if not skip_confirm:
@@ -54,19 +252,17 @@ def execute(to: str, subject: str, body: str, cc: str = "", skip_confirm: bool =
         if confirm != "y":
             return "Email cancelled by user."
 
-    msg = EmailMessage()
-    msg["From"] = address
-    msg["To"] = to
-    if cc:
-        msg["Cc"] = cc
-    msg["Subject"] = subject
-    msg.set_content(body)
-
-    try:
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(address, password)
-            server.send_message(msg)
-        return f"Email sent to {to}" + (f" (cc: {cc})" if cc else "")
-    except Exception as e:
-        return f"Failed to send email: {e}"
+    msg = build_message(to, subject, body, cc)
+    if settings is None:
+        error = "EMAIL_ADDRESS and EMAIL_APP_PASSWORD must be set in .env"
+    else:
+        with _session.lock:
+            error = _send_one(msg, settings)
+    if error is None:
+        return _describe(msg)
+    # Whatever went wrong, keep the message rather than drop it — unless it may
+    # already be in the recipient's inbox
+    if spool_on_failure and not isinstance(error, DeliveryUnknown):
+        path = spool(msg)
+        return f"Failed to send email: {error} — queued in {path} for retry"
+    return f"Failed to send email: {error}"
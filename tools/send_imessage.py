@@ -1,6 +1,14 @@
+import hashlib
+import os
+import queue
+import re
+import shlex
 import subprocess
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from pathlib import Path
 
-from tools._contacts import resolve_contact, _normalize_phone
+from tools._contacts import search_contacts, _normalize_phone
 
 schema = {
     "name": "send_imessage",
@@ -28,6 +36,172 @@ schema = {
     },
 }
 
+cache_ttl = 0  # sends a message — never cached
+
+# The best-ranked contact is used only if every query word matched exactly or as
+# a prefix, and its name match beats every other name's by this much — recency reorders candidates but never settles a tie on its own
+CLEAR_MARGIN = 0.15
+
+# Messages longer than this go out as several consecutive texts, split on paragraphs
+CHUNK_CHARS = 3000
+
+# Jobs queued within this window of each other share one backend process
+BATCH_WINDOW_SECONDS = 0.05
+BATCH_MAX = 20
+SEND_TIMEOUT = 60
+
+SCRIPT_DIR = Path.home() / ".cache" / "jarvis"
+
+# Recipients and texts arrive as argv pairs, so nothing needs escaping.
+# As each message goes out it logs (to stderr, unbuffered) "<n> ok" or
+# "<n> error: <reason>", n counting messages from 1 — so if the run is killed
+# or dies halfway, the messages already sent are known.
+SEND_SCRIPT = """
+on run argv
+    tell application "Messages"
+        set targetService to 1st account whose service type = iMessage
+        repeat with i from 1 to (count of argv) by 2
+            set n to (i + 1) div 2
+            try
+                send (item (i + 1) of argv) to participant (item i of argv) of targetService
+                log (n as text) & " ok"
+            on error errMsg
+                log (n as text) & " error: " & errMsg
+            end try
+        end repeat
+    end tell
+end run
+"""
+
+_STATUS_LINE = re.compile(r"^(\d+) (ok|error: .*)$")
+
+
+def _backend_command() -> list[str]:
+    """Command that takes (recipient, message) argv pairs and reports each one as it goes.
+
+    IMESSAGE_BACKEND overrides it (e.g. a stand-in script on Linux); otherwise
+    SEND_SCRIPT is compiled once with osacompile and run by osascript.
+    """
+    override = os.environ.get("IMESSAGE_BACKEND")
+    if override:
+        return shlex.split(override)
+
+    digest = hashlib.sha1(SEND_SCRIPT.encode()).hexdigest()[:12]
+    compiled = SCRIPT_DIR / f"send_imessage-{digest}.scpt"
+    if not compiled.exists():
+        SCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+        source = compiled.with_suffix(".applescript")
+        source.write_text(SEND_SCRIPT)
+        result = subprocess.run(["osacompile", "-o", str(compiled), str(source)], capture_output=True, text=True)
+        if result.returncode != 0:
+            return ["osascript", str(source)]  # compiles on every run, but still works
+    return ["osascript", str(compiled)]
+
+
+class _SenderWorker:
+    """Background thread that drains queued sends in batches, one backend process per batch."""
+
+    def __init__(self):
+        self._jobs: queue.Queue[tuple[str, str, Future]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._command: list[str] | None = None
+
+    def submit(self, recipient: str, message: str) -> Future:
+        future: Future = Future()
+        self._jobs.put((recipient, message, future))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="imessage-sender", daemon=True)
+                self._thread.start()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._jobs.get()]
+            while len(batch) < BATCH_MAX:
+                try:
+                    batch.append(self._jobs.get(timeout=BATCH_WINDOW_SECONDS))
+                except queue.Empty:
+                    break
+            try:
+                statuses = self._send(batch)
+            except Exception as e:
+                # Anything unexpected fails this batch, never the thread
+                statuses = [f"error: {str(e) or type(e).__name__}"] * len(batch)
+            for job, status in zip(batch, statuses):
+                job[2].set_result(status)
+
+    def _send(self, batch: list[tuple[str, str, Future]]) -> list[str]:
+        argv = [arg for recipient, message, _ in batch for arg in (recipient, message)]
+        try:
+            if self._command is None or os.environ.get("IMESSAGE_BACKEND"):
+                self._command = _backend_command()
+            result = subprocess.run(
+                self._command + argv, capture_output=True, text=True, timeout=SEND_TIMEOUT
+            )
+        except subprocess.TimeoutExpired as e:
+            # Whatever was reported before the kill still went out
+            return _statuses(len(batch), e.stdout, e.stderr, f"timed out after {SEND_TIMEOUT}s")
+        except OSError as e:
+            self._command = None  # rebuild next time, e.g. once osacompile is available
+            return [f"error: {e}"] * len(batch)
+        failure = "no status reported"
+        if result.returncode != 0:
+            other = [line for line in result.stderr.splitlines() if line.strip() and not _STATUS_LINE.match(line)]
+            failure = other[-1].strip() if other else f"exit status {result.returncode}"
+        return _statuses(len(batch), result.stdout, result.stderr, failure)
+
+
+def _statuses(count: int, stdout, stderr, failure: str) -> list[str]:
+    """One status per message from the backend's "<n> ok" lines; unconfirmed ones get `failure`."""
+    reported: dict[int, str] = {}
+    for stream in (stdout, stderr):
+        if isinstance(stream, bytes):  # partial output from a timeout isn't decoded
+            stream = stream.decode(errors="replace")
+        for line in (stream or "").splitlines():
+            match = _STATUS_LINE.match(line.strip())
+            if match:
+                reported[int(match[1])] = match[2]
+    return [reported.get(n, f"error: {failure}") for n in range(1, count + 1)]
+
+
+_worker = _SenderWorker()
+
+
+def _chunks(message: str) -> list[str]:
+    if len(message) <= CHUNK_CHARS:
+        return [message]
+    chunks, current = [], ""
+    for paragraph in message.split("\n\n"):
+        while len(paragraph) > CHUNK_CHARS:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:CHUNK_CHARS])
+            paragraph = paragraph[CHUNK_CHARS:]
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) > CHUNK_CHARS:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def send_many(jobs: list[tuple[str, str]]) -> list[str]:
+    """Queue (recipient, message) pairs and wait for them. Returns "ok" or "error: ..." per job."""
+    futures = [_worker.submit(recipient, message) for recipient, message in jobs]
+    results = []
+    for f in futures:
+        try:
+            results.append(f.result(timeout=SEND_TIMEOUT * 2))
+        except FutureTimeout:
+            results.append(f"error: no result from the send queue after {SEND_TIMEOUT * 2}s")
+    return results
+
 
 def execute(message: str, contact: str = None, phone_number: str = None) -> str:
     if not contact and not phone_number:
@@ -36,44 +210,34 @@ def execute(message: str, contact: str = None, phone_number: str = None) -> str:
     try:
         # Resolve who we're sending to
         if contact:
-            matches = resolve_contact(contact)
+            matches = search_contacts(contact)
             if not matches:
                 return f"No contact found matching '{contact}'."
-            if len(matches) > 1:
-                names = list({m["name"] for m in matches})
-                if len(names) > 1:
-                    listing = "\n".join(f"  - {m['name']}: {m['phone']}" for m in matches)
-                    return f"Multiple contacts match '{contact}':\n{listing}\nPlease be more specific or use phone_number."
             target = matches[0]
+            listing = "\n".join(f"  - {m['name']}: {m['phone']} (score {m['score']})" for m in matches[:5])
+            # A typo-tolerant match is only a suggestion — never text someone the user didn't name
+            if target["typo"]:
+                return (f"No contact exactly matches '{contact}'. Closest:\n{listing}\n"
+                        "Ask the user which one they meant, then retry with that name or phone_number.")
+            rivals = [m for m in matches if m["name"] != target["name"]]
+            if rivals and target["match"] - max(m["match"] for m in rivals) < CLEAR_MARGIN:
+                return f"Multiple contacts match '{contact}':\n{listing}\nPlease be more specific or use phone_number."
             recipient = target["phone"]
             display = f"{target['name']} ({recipient})"
         else:
             recipient = _normalize_phone(phone_number)
             display = recipient
 
-        # Escape backslashes and double quotes for AppleScript string
-        safe_msg = message.replace("\\", "\\\\").replace('"', '\\"')
-        safe_num = recipient.replace("\\", "\\\\").replace('"', '\\"')
-
-        script = f'''
-            tell application "Messages"
-                set targetService to 1st account whose service type = iMessage
-                set targetBuddy to participant "{safe_num}" of targetService
-                send "{safe_msg}" to targetBuddy
-            end tell
-        '''
-
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True,
-            timeout=15,
-        )
-
-        if result.returncode != 0:
-            return f"Failed to send: {result.stderr.strip()}"
+        chunks = _chunks(message)
+        statuses = send_many([(recipient, chunk) for chunk in chunks])
+        failed = [s for s in statuses if s != "ok"]
+        if failed:
+            sent = len(statuses) - len(failed)
+            prefix = f"{sent} of {len(statuses)} parts sent; " if sent else ""
+            return f"Failed to send: {prefix}{failed[0].removeprefix('error: ')}"
 
-        return f"Message sent to {display}."
+        parts = f" in {len(chunks)} parts" if len(chunks) > 1 else ""
+        return f"Message sent to {display}{parts}."
 
     except Exception as e:
         return f"Error sending iMessage: {e}"
@@ -1,4 +1,4 @@
-import subprocess
+from tools._cli import cli_output, run_cli
 
 schema = {
     "name": "trends_related",
@@ -29,10 +29,13 @@ schema = {
     },
 }
 
+cache_ttl = 1800
+parallel_safe = True
+
 
 def execute(query: str, geo: str = "US", limit: int = 5) -> str:
-    cmd = ["trends", "related", query, "--limit", str(limit), "--format", "json"]
+    args = ["related", query, "--limit", str(limit), "--format", "json"]
     if geo:
-        cmd += ["--geo", geo]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-    return result.stdout.strip() or result.stderr.strip() or "No results."
+        args += ["--geo", geo]
+    result = run_cli("trends", args)
+    return cli_output(result)
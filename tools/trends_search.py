@@ -1,12 +1,19 @@
 import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from tools._cli import cli_output, run_cli
+from tools._trends import format_table, parse_series, signal_features, signals_for, stack
 
 schema = {
     "name": "trends_search",
     "description": (
         "Get Google Trends interest over time for a topic. Returns interest score (0–100), "
-        "peak date/value, current value, average, and time series data. Use this to gauge "
-        "public interest in a topic — e.g. is 'AI' trending up or down this year?"
+        "peak date/value, current value and average. Use this to gauge "
+        "public interest in a topic — e.g. is 'AI' trending up or down this year? Also returns "
+        "signals computed from the series: trend slope, z-score of the latest point, breakout "
+        "flag and (seasonality-adjusted) change. Pass `queries` to compare several topics in "
+        "one call — returns one compact line per topic, strongest signal first."
     ),
     "input_schema": {
         "type": "object",
@@ -15,6 +22,11 @@ schema = {
                 "type": "string",
                 "description": "Topic to look up (e.g. 'bitcoin', 'artificial intelligence')",
             },
+            "queries": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Several topics to compare in one call (up to 10); use instead of query",
+            },
             "timeframe": {
                 "type": "string",
                 "description": "Time window: 1h, 4h, 1d, 7d, 1m, 3m, 1y, 5y, 10y (default: 1y)",
@@ -26,20 +38,56 @@ schema = {
                 "default": "US",
             },
         },
-        "required": ["query"],
+        "required": [],
     },
 }
 
+cache_ttl = 1800
+parallel_safe = True
+
+
+# Topics per batched call, and how many are fetched at once
+MAX_QUERIES = 10
+FETCH_PARALLEL = 4
+
 
-def execute(query: str, timeframe: str = "1y", geo: str = "US") -> str:
-    cmd = ["trends", "search", query, "--timeframe", timeframe, "--format", "json"]
+def _fetch(query: str, timeframe: str, geo: str) -> dict | str:
+    """Parsed CLI JSON for one topic, or its error text."""
+    args = ["search", query, "--timeframe", timeframe, "--format", "json"]
     if geo:
-        cmd += ["--geo", geo]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-    output = result.stdout.strip() or result.stderr.strip() or "No results."
+        args += ["--geo", geo]
+    try:
+        result = run_cli("trends", args)
+    except subprocess.TimeoutExpired:
+        return "Error: timed out fetching Google Trends."
+    except OSError as e:
+        return f"Error running trends: {e}"
+    output = cli_output(result)
     try:
         data = json.loads(output)
-        data.pop("series", None)
-        return json.dumps(data)
-    except (json.JSONDecodeError, AttributeError):
+    except json.JSONDecodeError:
         return output
+    return data if isinstance(data, dict) else output
+
+
+def execute(query: str = None, timeframe: str = "1y", geo: str = "US", queries: list[str] = None) -> str:
+    if queries:
+        topics = list(dict.fromkeys([query, *queries] if query else queries))[:MAX_QUERIES]
+        with ThreadPoolExecutor(max_workers=min(FETCH_PARALLEL, len(topics))) as pool:
+            fetched = list(pool.map(lambda q: _fetch(q, timeframe, geo), topics))
+        found = [(q, d) for q, d in zip(topics, fetched) if isinstance(d, dict)]
+        errors = {q: d.removeprefix("Error: ") for q, d in zip(topics, fetched) if not isinstance(d, dict)}
+        if not found:
+            return "Error: no topics could be fetched — " + "; ".join(f"{q}: {e}" for q, e in errors.items())
+        features = signal_features(stack([parse_series(d.get("series"), q) for q, d in found]), timeframe)
+        return format_table([q for q, _ in found], features, errors)
+
+    if not query:
+        return "Error: provide 'query' or 'queries'."
+    data = _fetch(query, timeframe, geo)
+    if not isinstance(data, dict):
+        return data
+    series = parse_series(data.pop("series", None), query)
+    if len(series):
+        data["signals"] = signals_for(signal_features(stack([series]), timeframe), 0)
+    return json.dumps(data)
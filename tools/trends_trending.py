@@ -1,4 +1,4 @@
-import subprocess
+from tools._cli import cli_output, run_cli
 
 schema = {
     "name": "trends_trending",
@@ -30,10 +30,13 @@ schema = {
     },
 }
 
+cache_ttl = 600
+parallel_safe = True
+
 
 def execute(geo: str = "US", limit: int = 10, realtime: bool = False) -> str:
-    cmd = ["trends", "trending", "--geo", geo, "--limit", str(limit), "--format", "json"]
+    args = ["trending", "--geo", geo, "--limit", str(limit), "--format", "json"]
     if realtime:
-        cmd.append("--realtime")
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-    return result.stdout.strip() or result.stderr.strip() or "No results."
+        args.append("--realtime")
+    result = run_cli("trends", args)
+    return cli_output(result)
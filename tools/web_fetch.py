@@ -1,8 +1,13 @@
 import os
-from firecrawl import Firecrawl
+
+from tools import _http
 
 MAX_CHARS = 20000
 
+SCRAPE_URL = "https://api.firecrawl.dev/v2/scrape"
+# Firecrawl renders JavaScript server-side, so scrapes can take a while
+SCRAPE_TIMEOUT = 60
+
 schema = {
     "name": "web_fetch",
     "description": "Fetch the contents of a URL and return the page as clean markdown. Handles JavaScript-rendered pages, paywalls, and anti-bot measures. Response is truncated to ~20k characters.",
@@ -18,22 +23,24 @@ schema = {
     }
 }
 
-_app = None
-
-def _get_app():
-    global _app
-    if _app is None:
-        _app = Firecrawl(api_key=os.environ.get("FIRECRAWL_API_KEY"))
-    return _app
+cache_ttl = 900
+parallel_safe = True
 
 
 def execute(url: str) -> str:
     try:
-        result = _get_app().scrape(url, formats=["markdown"], only_main_content=True)
+        resp = _http.post(
+            SCRAPE_URL,
+            json={"url": url, "formats": ["markdown"], "onlyMainContent": True},
+            headers={"Authorization": f"Bearer {os.environ.get('FIRECRAWL_API_KEY', '')}"},
+            timeout=SCRAPE_TIMEOUT,
+        )
+        resp.raise_for_status()
+        result = resp.json()
     except Exception as e:
         return f"Fetch failed for {url}: {e}"
 
-    text = result.markdown or ""
+    text = (result.get("data") or {}).get("markdown") or ""
 
     if not text:
         return f"No content returned for {url}"
@@ -19,6 +19,8 @@ schema = {
     }
 }
 
+cache_ttl = 0  # writes to disk — never cached
+
 
 def execute(path: str, content: str) -> str:
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
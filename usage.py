@@ -14,17 +14,24 @@ PRICE_TABLE: dict[str, tuple[float, float]] = {
     "gpt-5.1":                      (1.25,  10.00),
 }
 
+# Prompt-cache pricing relative to the model's input price
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.10
+
 
 @dataclass
 class UsageTracker:
     budget: BudgetConfig
     total_input: int = 0
     total_output: int = 0
+    total_cache_read: int = 0
+    total_cache_write: int = 0
     _warned: bool = field(default=False, repr=False)
 
     @property
     def total_tokens(self) -> int:
-        return self.total_input + self.total_output
+        # Cached tokens still occupy the context window, so they count toward the budget
+        return self.total_input + self.total_output + self.total_cache_read + self.total_cache_write
 
     @property
     def over_budget(self) -> bool:
@@ -34,6 +41,8 @@ class UsageTracker:
         """Record usage from a ChatResult and print warnings if near budget."""
         self.total_input += result.usage.input_tokens
         self.total_output += result.usage.output_tokens
+        self.total_cache_read += result.usage.cache_read_tokens
+        self.total_cache_write += result.usage.cache_write_tokens
 
         pct = (self.total_tokens / self.budget.max_tokens_per_session) * 100
         if pct >= self.budget.warn_at_percent and not self._warned:
@@ -45,11 +54,21 @@ class UsageTracker:
 
     def summary(self, model_name: str | None = None) -> str:
         """Return a human-readable usage summary."""
+        cached = self.total_cache_read + self.total_cache_write
         lines = [
+            f"Tokens: {self.total_input:,} in + {cached:,} cached + {self.total_output:,} out = {self.total_tokens:,} total"
+            if cached else
             f"Tokens: {self.total_input:,} in + {self.total_output:,} out = {self.total_tokens:,} total",
         ]
+        if cached:
+            lines.append(f"Cache: {self.total_cache_read:,} read + {self.total_cache_write:,} written")
         if model_name and model_name in PRICE_TABLE:
             inp_price, out_price = PRICE_TABLE[model_name]
-            cost = (self.total_input / 1_000_000 * inp_price) + (self.total_output / 1_000_000 * out_price)
+            cost = (
+                (self.total_input / 1_000_000 * inp_price)
+                + (self.total_output / 1_000_000 * out_price)
+                + (self.total_cache_read / 1_000_000 * inp_price * CACHE_READ_MULTIPLIER)
+                + (self.total_cache_write / 1_000_000 * inp_price * CACHE_WRITE_MULTIPLIER)
+            )
             lines.append(f"Estimated cost: ${cost:.4f}")
         return "\n".join(lines)